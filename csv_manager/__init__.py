@@ -1,5 +1,20 @@
-from .plotter import Plotter
 from .datafile import DataFile
 from . import writer
 from .database import Database
+from .table import Range, Equals, Prefix, OneOf
+from . import misc
 from .misc import *
+
+# `Plotter` is lazily imported, it still is part of `from csv_manager import *`
+__all__ = ["DataFile", "Database", "Plotter", "writer", "Range", "Equals", "Prefix", "OneOf"] + misc.__all__
+
+def __getattr__(name):
+    # `Plotter`, and matplotlib with it, is only imported when first used
+    if name == "Plotter":
+        from .plotter import Plotter
+        globals()["Plotter"] = Plotter
+        return Plotter
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals().keys()) + ["Plotter"])
@@ -0,0 +1,56 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of threads of the executor that runs the blocking work of the async API
+DEFAULT_ASYNC_WORKERS = 4
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# (event loop, key) -> task of the calls of `run_shared()` in flight
+_in_flight = dict()
+
+def get_executor() -> ThreadPoolExecutor:
+    r"""
+    Returns the executor, shared by the whole async API, that runs the blocking file reads and parsing
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_ASYNC_WORKERS, thread_name_prefix="csv_manager")
+        return _executor
+
+def set_async_workers(workers: int):
+    r"""
+    Changes the number of threads that run the blocking work of the async API, the calls already running finish normally
+    """
+    global _executor
+    with _executor_lock:
+        previous_executor = _executor
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="csv_manager")
+    if previous_executor is not None:
+        previous_executor.shutdown(wait=False)
+
+async def run_blocking(function, *args, **kwargs):
+    r"""
+    Runs `function(*args, **kwargs)` in the executor of the async API without blocking the event loop
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(function, *args, **kwargs))
+
+async def run_shared(key, function, *args, **kwargs):
+    r"""
+    Same as `run_blocking()`, but concurrent calls with the same hashable `key` share a single run of `function`:
+    the calls made while it is in flight wait for it and get its result.
+    """
+    loop = asyncio.get_running_loop()
+    task_key = (loop, key)
+    task = _in_flight.get(task_key)
+    if task is None:
+        task = loop.create_task(run_blocking(function, *args, **kwargs))
+        _in_flight[task_key] = task
+        task.add_done_callback(lambda done_task: _in_flight.pop(task_key, None))
+    # a cancelled caller doesn't cancel the run the other callers wait for
+    return await asyncio.shield(task)
@@ -0,0 +1,191 @@
+import threading
+from collections import OrderedDict
+
+DEFAULT_RESULT_CACHE_MAX_BYTES = 64 * 1024 ** 2
+DEFAULT_EXPRESSION_CACHE_MAX_ENTRIES = 256
+
+class LRUCache:
+    r"""
+    A least recently used cache with a memory budget and/or a maximum number of entries.
+    Each entry can be given a set of tags (e.g. the variable names it has been computed from)
+    so it can be invalidated when one of them changes.
+    """
+
+    def __init__(self, max_bytes=None, max_entries=None):
+        r"""
+        Parameters
+        ----------
+
+        max_bytes : int or None
+            Memory budget of the cache, the least recently used entries get evicted when the sum of the
+            sizes of the entries goes over it. `None` means no budget, 0 disables the cache
+
+        max_entries : int or None
+            Maximum number of entries in the cache, `None` means no limit
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+        self.misses += 1
+        return default
+
+    def put(self, key, value, size: int = 0, tags=()):
+        r"""
+        Adds `value` to the cache, `size` is its memory footprint in bytes, and `tags` is a
+        container of hashables that can be used to invalidate this entry with `invalidate()`
+        """
+        self.discard(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if self.max_entries == 0:
+            return
+
+        self._entries[key] = (value, size, frozenset(tags))
+        self.current_bytes += size
+        self._evict()
+
+    def discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def invalidate(self, tags):
+        r"""
+        Removes every entry that has at least one tag in `tags`
+        """
+        tags = set(tags)
+        for key in [key for key, (value, size, entry_tags) in self._entries.items() if entry_tags & tags]:
+            self.discard(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def _evict(self):
+        while self._entries and ((self.max_bytes is not None and self.current_bytes > self.max_bytes) or
+                                 (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            key, (value, size, tags) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+class PayloadCache:
+    r"""
+    A memory budget over the columns loaded by a set of DataFile objects, e.g. the files of a `Database`.
+
+    The files report to it each time their data is accessed: when the loaded data of all the files goes over
+    `max_bytes`, the least recently used files get their columns dropped, they are read again from disk
+    when needed. Files with changes that are not saved to disk are never evicted, nor the files being read.
+    """
+
+    def __init__(self, max_bytes=None):
+        r"""
+        Parameters
+        ----------
+
+        max_bytes : int or None
+            Memory budget of the loaded data, `None` means no budget
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        # id(datafile) -> [datafile, size]
+        self._entries = OrderedDict()
+        self._in_use = dict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def acquire(self, datafile):
+        r"""
+        Protects `datafile` from eviction until `release()` gets called
+        """
+        with self._lock:
+            self._in_use[id(datafile)] = self._in_use.get(id(datafile), 0) + 1
+
+    def release(self, datafile):
+        with self._lock:
+            count = self._in_use.pop(id(datafile)) - 1
+            if count:
+                self._in_use[id(datafile)] = count
+            self._evict()
+
+    def touch(self, datafile, loaded=None):
+        r"""
+        Marks the data of `datafile` as the most recently used and updates its size, then evicts other files if needed.
+        `loaded` tells whether the data had to be read from disk (a miss) or was already in memory (a hit),
+        `None` doesn't count the access.
+        """
+        with self._lock:
+            if loaded is True:
+                self.misses += 1
+            elif loaded is False:
+                self.hits += 1
+
+            self._remove(datafile)
+            if not datafile._is_pinned():
+                size = datafile._payload_nbytes()
+                if size:
+                    self._entries[id(datafile)] = [datafile, size]
+                    self.current_bytes += size
+            self._evict()
+
+    def discard(self, datafile):
+        r"""
+        Stops tracking `datafile`, without dropping its data
+        """
+        with self._lock:
+            self._remove(datafile)
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        r"""
+        Drops the data of all the files that can be evicted
+        """
+        with self._lock:
+            self._evict(everything=True)
+
+    def _remove(self, datafile):
+        entry = self._entries.pop(id(datafile), None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def _evict(self, everything=False):
+        # files are unloaded while holding the lock, so they can't be acquired in between
+        for key in list(self._entries.keys()):
+            if not everything and (self.max_bytes is None or self.current_bytes <= self.max_bytes):
+                break
+            if key in self._in_use:
+                continue
+            datafile, size = self._entries.pop(key)
+            self.current_bytes -= size
+            self.evictions += 1
+            datafile._unload_columns()
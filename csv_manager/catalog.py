@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+CATALOG_FILENAME = ".csv_manager_catalog.sqlite"
+
+class Catalog:
+    r"""
+    An SQLite file that stores the metadata (column names, sim settings and scalar results) of each CSV file
+    of a folder, keyed by its path relative to the folder, its size and its modification time. It lets a
+    `Database` skip reading the files that didn't change since the last time the folder got loaded.
+    """
+
+    def __init__(self, data_folder_path, catalog_path=None):
+        r"""
+        Parameters
+        ----------
+
+        data_folder_path : str or Path
+            The folder whose CSV files are catalogued
+
+        catalog_path : str, Path or None
+            The SQLite file to use, defaults to `CATALOG_FILENAME` inside `data_folder_path`
+        """
+        self.data_folder_path = Path(data_folder_path)
+        self.catalog_path = Path(catalog_path) if catalog_path else self.data_folder_path / CATALOG_FILENAME
+
+        # the catalog can be used by another thread than the one that created it, e.g. by `Database.aload_from_folder()`,
+        # but by one thread at a time
+        self._connection = sqlite3.connect(str(self.catalog_path), check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "    path TEXT PRIMARY KEY,"
+            "    size INTEGER NOT NULL,"
+            "    mtime_ns INTEGER NOT NULL,"
+            "    options TEXT NOT NULL,"
+            "    metadata TEXT NOT NULL"
+            ")"
+        )
+        self._entries = {path: (size, mtime_ns, options, metadata) for path, size, mtime_ns, options, metadata in
+                         self._connection.execute("SELECT path, size, mtime_ns, options, metadata FROM files")}
+        self._updated_entries = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _key(self, filepath) -> str:
+        return Path(os.path.relpath(filepath, self.data_folder_path)).as_posix()
+
+    @staticmethod
+    def file_signature(filepath):
+        r"""
+        Returns the (size, mtime_ns) pair used to detect that a file changed
+        """
+        stat = os.stat(filepath)
+        return stat.st_size, stat.st_mtime_ns
+
+    def lookup(self, filepath, signature, options) -> dict:
+        r"""
+        Returns the metadata of `filepath` stored in the catalog, or None if the file isn't catalogued yet,
+        has changed since (its `signature` differs), or has been catalogued with different loading `options`
+        """
+        entry = self._entries.get(self._key(filepath))
+        if entry is None:
+            return None
+        size, mtime_ns, entry_options, metadata = entry
+        if (size, mtime_ns) != tuple(signature) or entry_options != json.dumps(options):
+            return None
+        return json.loads(metadata)
+
+    def store(self, filepath, signature, options, metadata: dict):
+        size, mtime_ns = signature
+        entry = (size, mtime_ns, json.dumps(options), json.dumps(metadata))
+        key = self._key(filepath)
+        self._entries[key] = entry
+        self._updated_entries[key] = entry
+
+    def prune(self, existing_filepaths):
+        r"""
+        Removes from the catalog the files that are not in `existing_filepaths`
+        """
+        existing_keys = set(self._key(filepath) for filepath in existing_filepaths)
+        deleted_keys = [key for key in self._entries if key not in existing_keys]
+        for key in deleted_keys:
+            del self._entries[key]
+            self._updated_entries.pop(key, None)
+        self._connection.executemany("DELETE FROM files WHERE path = ?", [(key,) for key in deleted_keys])
+
+    def commit(self):
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, options, metadata) VALUES (?, ?, ?, ?, ?)",
+            [(key, *entry) for key, entry in self._updated_entries.items()]
+        )
+        self._connection.commit()
+        self._updated_entries.clear()
+
+    def close(self):
+        self.commit()
+        self._connection.close()
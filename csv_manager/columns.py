@@ -0,0 +1,287 @@
+import numpy as np
+
+def identity(val):
+    return val
+
+def get_complex(val):
+    try:
+        return complex(val)
+    except ValueError:
+        return complex("nan")
+
+def is_complex(s):
+    try:
+        complex(s)
+        return True
+    except ValueError:
+        return False
+
+def get_integer(val):
+    try:
+        return int(val)
+    except ValueError:
+        raise ValueError("Casting a non integer value: ", val)
+
+def is_integer(s):
+    try:
+        int(s)
+        return True
+    except ValueError:
+        return False
+
+def get_float(val):
+    try:
+        return float(val)
+    except ValueError:
+        return float("nan")
+
+def is_float(s):
+    try:
+        float(s)
+        return True
+    except ValueError:
+        return False
+
+DATA_TYPES = ("string", "integer", "float", "complex")
+
+# Minimal fraction of numerical values among the non-empty cells of a column of strings for it to be considered "mixed"
+MIXED_COLUMN_MIN_NUMERIC_FRACTION = 0.5
+
+def value_to_string(val) -> str:
+    r"""
+    Returns the CSV cell representation of `val`: missing values (None or NaN) become empty cells
+    """
+    if val is None:
+        return ""
+    if isinstance(val, str):
+        return val
+    if val != val:
+        # NaN, either float or complex
+        return ""
+    if isinstance(val, float) and val.is_integer() and abs(val) < 1e15:
+        # keep integral values, that may have been promoted to float by empty cells, as they were written
+        return str(int(val))
+    return str(val)
+
+def _normalize(array: np.ndarray) -> np.ndarray:
+    r"""
+    Returns a copy of the numerical `array` in one of the storage dtypes: int64, float64 or complex128
+    """
+    kind = array.dtype.kind
+    if kind in "biu":
+        return array.astype(np.int64)
+    elif kind == "f":
+        return array.astype(np.float64)
+    elif kind == "c":
+        return array.astype(np.complex128)
+    return np.array([value_to_string(val) for val in array.tolist()], dtype=object)
+
+def parse_column(cells) -> np.ndarray:
+    r"""
+    Parses a list of CSV cells (strings) into a typed numpy array, converting each cell only once.
+
+    The column is stored as int64 if every cell is an integer, float64 if every non-empty cell is
+    a float (empty cells become NaN), complex128 if every non-empty cell is a complex number
+    and as an object array of strings otherwise.
+    """
+    text = np.array(cells, dtype=str)
+    empty = text == ""
+    if empty.all():
+        return np.array(cells, dtype=object)
+
+    # numpy parses the whole array at once, and raises if any cell isn't a number of that type
+    if not empty.any():
+        try:
+            return text.astype(np.int64)
+        except (ValueError, OverflowError):
+            pass
+
+    try:
+        column = np.full(len(text), np.nan)
+        column[~empty] = text[~empty].astype(np.float64)
+        return column
+    except ValueError:
+        pass
+
+    try:
+        return np.array([complex(cell) if cell != "" else complex("nan") for cell in cells], dtype=np.complex128)
+    except ValueError:
+        return np.array(cells, dtype=object)
+
+def split_mixed_column(column: np.ndarray, min_numeric_fraction: float = MIXED_COLUMN_MIN_NUMERIC_FRACTION):
+    r"""
+    Splits a column of strings that mostly contains numbers into a float64 column, with NaN for the cells that
+    are not numbers, and the (rows, texts) arrays of these non numerical cells.
+
+    Returns None if less than `min_numeric_fraction` of the non-empty cells are numbers.
+    """
+    cells = column.tolist()
+    values = np.full(len(cells), np.nan)
+    filled_count = 0
+    text_rows = []
+    for row, cell in enumerate(cells):
+        if cell == "":
+            continue
+        filled_count += 1
+        try:
+            values[row] = float(cell)
+        except ValueError:
+            text_rows.append(row)
+
+    numeric_count = filled_count - len(text_rows)
+    if numeric_count == 0 or numeric_count < min_numeric_fraction * filled_count:
+        return None
+    return values, np.array(text_rows, dtype=np.int64), np.array([cells[row] for row in text_rows], dtype=object)
+
+def column_type(column: np.ndarray) -> str:
+    r"""
+    Returns the type of a typed column: "integer", "float", "complex" or "string"
+    """
+    return {"i": "integer", "f": "float", "c": "complex"}.get(column.dtype.kind, "string")
+
+def make_column(values) -> np.ndarray:
+    r"""
+    Creates a typed column from user provided `values`: a numpy array, or a list of numbers and/or strings.
+    `None` values are considered missing, strings are parsed the same way as cells read from a CSV file.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "biufc":
+        return _normalize(values)
+
+    values = list(values)
+    if not any(isinstance(val, str) for val in values):
+        try:
+            array = np.array([np.nan if val is None else val for val in values])
+        except (TypeError, ValueError, OverflowError):
+            array = None
+        if array is not None and array.dtype.kind in "biufc" and array.ndim == 1:
+            return _normalize(array)
+
+    return parse_column([value_to_string(val) for val in values])
+
+def format_column(column: np.ndarray, float_format: str = None) -> np.ndarray:
+    r"""
+    Returns the CSV cells (strings) that represent the typed `column`, as an object array, formatting the
+    column at once rather than value by value: missing values (NaN) become empty cells and, unless `float_format`
+    is given, integral floats are written as integers, the other floats with the shortest repr that reads back the same value.
+
+    Parameters
+    ----------
+
+    float_format : str or None
+        A printf-style format for float values, e.g. "%.6g"
+    """
+    kind = column.dtype.kind
+    if kind == "O":
+        return column
+    elif kind in "biu":
+        return np.array(list(map(str, column.tolist())), dtype=object)
+    elif kind == "f":
+        strings = np.full(len(column), "", dtype=object)
+        finite = np.isfinite(column)
+        if float_format is not None:
+            strings[finite] = list(map(float_format.__mod__, column[finite].tolist()))
+        else:
+            integral = finite & (np.abs(column) < 1e15)
+            integral[integral] = column[integral] == np.floor(column[integral])
+            strings[integral] = list(map(str, column[integral].astype(np.int64).tolist()))
+            strings[finite & ~integral] = list(map(str, column[finite & ~integral].tolist()))
+        infinite = np.isinf(column)
+        strings[infinite] = list(map(str, column[infinite].tolist()))
+        return strings
+    return np.array([value_to_string(val) for val in column.tolist()], dtype=object)
+
+def column_to_strings(column: np.ndarray) -> list:
+    r"""
+    Returns the list of CSV cells (strings) that represent `column`
+    """
+    return format_column(column).tolist()
+
+def _is_all_empty(column: np.ndarray) -> bool:
+    return column.dtype.kind == "O" and all(val == "" for val in column.tolist())
+
+def join_columns(parts) -> np.ndarray:
+    r"""
+    Returns the concatenation of a list of typed columns, promoting the result's type if needed.
+    Parts that only contain empty cells become NaN when the other parts are numerical.
+    """
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return np.array([], dtype=np.float64)
+    if len(parts) == 1:
+        return parts[0]
+
+    numeric_parts = [part for part in parts if part.dtype.kind != "O"]
+    object_parts = [part for part in parts if part.dtype.kind == "O"]
+
+    if not object_parts or not numeric_parts:
+        return np.concatenate(parts)
+
+    if all(_is_all_empty(part) for part in object_parts):
+        dtype = np.result_type(np.float64, *numeric_parts)
+        return np.concatenate([part.astype(dtype) if part.dtype.kind != "O" else np.full(len(part), np.nan, dtype=dtype)
+                               for part in parts])
+
+    cells = []
+    for part in parts:
+        cells += column_to_strings(part)
+    return parse_column(cells)
+
+def concat_columns(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    r"""
+    Returns the concatenation of two typed columns, promoting the result's type if needed
+    """
+    if len(first) == 0:
+        return second
+    if len(second) == 0:
+        return first
+    return join_columns([first, second])
+
+def readonly(array: np.ndarray) -> np.ndarray:
+    r"""
+    Returns a read-only, zero-copy, view of `array`
+    """
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+def cast_column(column: np.ndarray, data_type: str) -> np.ndarray:
+    r"""
+    Returns `column` cast to `data_type`: "string", "integer", "float" or "complex".
+    When `column` already has the requested type, a read-only view is returned instead of a copy.
+    """
+    kind = column.dtype.kind
+
+    if data_type == "string":
+        if kind == "O":
+            return readonly(column)
+        return np.array(column_to_strings(column), dtype=object)
+
+    elif data_type == "float":
+        if kind == "f":
+            return readonly(column)
+        elif kind == "i":
+            return column.astype(np.float64)
+        elif kind == "c":
+            return np.where(column.imag == 0, column.real, np.nan)
+        return np.array([get_float(val) for val in column.tolist()], dtype=np.float64)
+
+    elif data_type == "integer":
+        if kind == "i":
+            return readonly(column)
+        elif kind == "f":
+            bad = ~np.isfinite(column) | (column != np.floor(column))
+            if bad.any():
+                raise ValueError("Casting a non integer value: ", column[bad][0])
+            return column.astype(np.int64)
+        elif kind == "c":
+            raise ValueError("Casting a non integer value: ", column[0] if len(column) else "")
+        return np.array([get_integer(val) for val in column.tolist()], dtype=np.int64)
+
+    elif data_type == "complex":
+        if kind == "c":
+            return readonly(column)
+        elif kind in "if":
+            return column.astype(np.complex128)
+        return np.array([get_complex(val) for val in column.tolist()], dtype=np.complex128)
+
+    raise ValueError("the given `data_type' doesn't match any known types. Which are `string', `integer', `float' or `complex'")
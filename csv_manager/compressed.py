@@ -0,0 +1,74 @@
+import gzip
+import io
+import lzma
+from pathlib import Path
+
+# Compressions recognized from the file extension, ".zst" files need python >= 3.14 or the `zstandard` package
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".xz": "xz", ".zst": "zstd"}
+CSV_EXTENSIONS = (".csv",) + tuple(".csv" + extension for extension in COMPRESSION_EXTENSIONS)
+
+def compression_of(filepath) -> str:
+    r"""
+    Returns the compression of `filepath` given by its extension: "gzip", "xz", "zstd", or None if it isn't compressed
+    """
+    return COMPRESSION_EXTENSIONS.get(Path(filepath).suffix)
+
+def is_csv_filename(filename: str) -> bool:
+    return filename.endswith(CSV_EXTENSIONS)
+
+def strip_csv_extension(filename: str) -> str:
+    r"""
+    Returns `filename` without its ".csv" extension, compressed or not, e.g. "run.csv.gz" gives "run"
+    """
+    for extension in CSV_EXTENSIONS:
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return filename
+
+def open_file(filepath, mode="r", newline=None, buffering=-1, compression="infer"):
+    r"""
+    Opens `filepath` in text mode, like `open()`, and (de)compresses it on the fly when it is compressed.
+    Decompression is streamed: only the part of the file that is read gets decompressed.
+
+    Parameters
+    ----------
+
+    mode : str
+        "r", "w" or "a". Appending to a compressed file adds a new compressed stream after the existing ones,
+        which is read back as a single file.
+
+    compression : str or None
+        "gzip", "xz", "zstd" or None, "infer" uses the extension of `filepath`
+    """
+    if compression == "infer":
+        compression = compression_of(filepath)
+    text_mode = mode[0] + "t"
+
+    if compression is None:
+        return open(filepath, mode, newline=newline, buffering=buffering)
+    elif compression == "gzip":
+        return gzip.open(filepath, text_mode, newline=newline)
+    elif compression == "xz":
+        return lzma.open(filepath, text_mode, newline=newline)
+    elif compression == "zstd":
+        return _open_zstd(filepath, text_mode, newline)
+    raise ValueError("Unknown compression: {0}".format(compression))
+
+def _open_zstd(filepath, text_mode, newline):
+    try:
+        from compression import zstd
+        return zstd.open(filepath, text_mode, newline=newline)
+    except ImportError:
+        pass
+
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("Reading or writing .zst files needs python >= 3.14 or the `zstandard` package")
+
+    raw_file = open(filepath, text_mode[0] + "b")
+    if text_mode[0] == "r":
+        stream = zstandard.ZstdDecompressor().stream_reader(raw_file, read_across_frames=True, closefd=True)
+    else:
+        stream = zstandard.ZstdCompressor().stream_writer(raw_file, closefd=True)
+    return io.TextIOWrapper(stream, newline=newline)
@@ -1,21 +1,189 @@
 from pathlib import Path
-from typing import List, Union
+from typing import List, Union, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from .datafile import DataFile
+from .catalog import Catalog
+from .index import SettingsIndex
+from .table import SettingsTable, as_predicate
+from .cache import PayloadCache
+from .streaming import PointwiseStats
+from .aio import run_blocking
+from .compressed import is_csv_filename
+from .watcher import FolderWatcher
 from .misc import *
 
+import os
 import time
+import asyncio
+import threading
+import warnings
+from collections import Counter
+from bisect import insort
+
+import numpy as np
+
+def print_progress(loaded_count: int, total_count: int):
+    r"""
+    Default progress callback of `Database.load_from_folder()`
+    """
+    if loaded_count == 0:
+        print("Loading {} CSV files in database".format(total_count))
+    else:
+        print("  Progress = {:.0f} %".format(100*loaded_count/total_count))
+
+def _load_datafile(filepath, datafile_options: dict, metadata=None):
+    # Module level function so it can be pickled by process pools
+    return DataFile(str(filepath), metadata=metadata, **datafile_options)
+
+class _FolderLoad:
+    r"""
+    The loading of the CSV files of a folder, shared by `Database.load_from_folder()` and `Database.aload_from_folder()`:
+    lists the files, takes the metadata of the files that didn't change from the catalog, and collects the files
+    that have to be parsed, in any order, while reporting the progress
+    """
+
+    def __init__(self, data_folder_path, datafile_options: dict, progress_callback, progress_interval: float):
+        self.data_folder_path = data_folder_path
+        self.filepaths = [filepath for filepath in Path(data_folder_path).rglob("*.csv*") if is_csv_filename(filepath.name)]
+        self.datafiles = [None] * len(self.filepaths)
+        self.datafile_options = datafile_options
+        # the options the metadata depends on
+        self.options = [datafile_options[name] for name in ("csv_separator", "filename_var_separator", "skip_lines", "full_metadata_scan")]
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.to_parse = list(range(len(self.filepaths)))
+        self.loaded_count = 0
+        self._catalog = None
+        self._last_report_time = time.perf_counter()
+
+    def report_progress(self, force: bool = False):
+        now = time.perf_counter()
+        if self.progress_callback and (force or now - self._last_report_time >= self.progress_interval or
+                                       self.loaded_count == len(self.filepaths)):
+            self._last_report_time = now
+            self.progress_callback(self.loaded_count, len(self.filepaths))
+
+    def use_catalog(self, catalog):
+        r"""
+        Takes the files that didn't change from the catalog, see `Database.load_from_folder()`
+        """
+        if not catalog:
+            return
+        self._catalog = Catalog(self.data_folder_path, None if catalog is True else catalog)
+        self.signatures = [Catalog.file_signature(filepath) for filepath in self.filepaths]
+        self.to_parse = []
+        for index, filepath in enumerate(self.filepaths):
+            metadata = self._catalog.lookup(filepath, self.signatures[index], self.options)
+            if metadata is None:
+                self.to_parse.append(index)
+            else:
+                self.datafiles[index] = _load_datafile(filepath, self.datafile_options, metadata=metadata)
+        self.loaded_count = len(self.filepaths) - len(self.to_parse)
+
+    def add_parsed(self, index: int, datafile: DataFile):
+        self.datafiles[index] = datafile
+        if self._catalog:
+            self._catalog.store(self.filepaths[index], self.signatures[index], self.options, datafile.get_metadata())
+        self.loaded_count += 1
+        self.report_progress()
+
+    def close_catalog(self):
+        r"""
+        Saves the metadata of the files parsed so far in the catalog
+        """
+        if self._catalog:
+            self._catalog.prune(self.filepaths)
+            self._catalog.close()
+            self._catalog = None
+
+# Reducers of `Database.aggregate()` computed file by file, the others need the curves of all the files
+POINTWISE_REDUCERS = ("mean", "std", "var", "min", "max", "sum", "count")
+
+def _evaluated(datafile: DataFile, x_expr: str, y_expr: str):
+    r"""
+    Returns the (x, y) values of `datafile`, sorted by x, without the points where one of them is NaN.
+    The columns the file had to read are dropped afterwards, unless they have unsaved changes.
+    """
+    was_loaded = any(column is not None for column in datafile.columns)
+    try:
+        x = datafile.get(x_expr)
+        y = datafile.get(y_expr)
+    finally:
+        if not was_loaded and not datafile._is_pinned():
+            datafile._drop_columns()
+
+    row_count = min(len(x), len(y))
+    x, y = x[:row_count], y[:row_count]
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    order = np.argsort(x, kind="stable")
+    return x[order], y[order]
+
+def _x_range(datafile: DataFile, x_expr: str):
+    # Module level functions so they can be pickled by process pools
+    x, y = _evaluated(datafile, x_expr, x_expr)
+    return (x[0], x[-1]) if len(x) else None
+
+def _aligned_curve(datafile: DataFile, x_expr: str, y_expr: str, grid: np.ndarray) -> np.ndarray:
+    x, y = _evaluated(datafile, x_expr, y_expr)
+    if len(x) == 0:
+        return np.full(len(grid), np.nan)
+    # no extrapolation: NaN outside of the x range of the file
+    return np.interp(grid, x, y, left=np.nan, right=np.nan)
+
+def _parallel_map(function, argument_lists, workers, executor):
+    r"""
+    Returns an iterator over `function` applied to the arguments in `argument_lists`, in order,
+    on a pool of `workers` threads or processes when `workers` > 1
+    """
+    count = len(argument_lists[0])
+    if not workers or workers <= 1 or count <= 1:
+        return map(function, *argument_lists)
+    if executor not in ("thread", "process"):
+        raise ValueError("`executor` should be either \"thread\" or \"process\"")
+    pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+    chunksize = 1 if executor == "thread" else max(1, min(256, count // (4 * workers)))
+
+    def results():
+        with pool_class(max_workers=workers) as pool:
+            yield from pool.map(function, *argument_lists, chunksize=chunksize)
+    return results()
 
 class Database:
-    def __init__(self, data_folder_path=None, csv_separator=" ", filename_var_separator="|", skip_lines=0):
+    def __init__(self, data_folder_path=None, csv_separator=" ", filename_var_separator="|", skip_lines=0,
+                 workers=None, executor="thread", progress_callback=print_progress, catalog=False,
+                 full_metadata_scan=False, reader="csv", sidecar=False, payload_max_bytes=None):
+        r"""
+        Parameters
+        ----------
+
+        payload_max_bytes : int or None
+            Memory budget of the columns loaded by the files of the database, see `PayloadCache`: the least recently used
+            files get their columns dropped when it is exceeded, and read again when needed. `None` means no budget.
+            Its hits, misses and evictions are counted in `self.payload_cache`.
+
+        The other parameters are given to `load_from_folder()` when `data_folder_path` is given.
+        """
         self.datafiles = []
+        self.payload_cache = PayloadCache(payload_max_bytes)
+        self._settings_index = SettingsIndex()
+        self._settings_table = None
+        self._data_folder_path = None
+        self._datafile_options = dict()
+        self._watcher = None
+        self._watch_lock = threading.Lock()
+        self._subscribers = []
         self.result_names_col = None
         self.result_values_col = None
         self.sim_settings_names_col = None
         self.sim_settings_values_col = None
 
         if data_folder_path:
-            self.load_from_folder(data_folder_path, csv_separator, filename_var_separator, skip_lines)
+            self.load_from_folder(data_folder_path, csv_separator, filename_var_separator, skip_lines,
+                                  workers=workers, executor=executor, progress_callback=progress_callback,
+                                  catalog=catalog, full_metadata_scan=full_metadata_scan, reader=reader,
+                                  sidecar=sidecar)
 
     def set_scalar_result_column_names(self, result_names_col: str, result_values_col: str):
         r"""
@@ -54,41 +222,337 @@ class Database:
         self.sim_settings_values_col = sim_settings_values_col
 
     def add(self, datafiles):
-        if isinstance(datafiles, list):
-            for datafile in datafiles:
-                assert(isinstance(datafile, DataFile))
-                self.datafiles.append(datafile)
-        elif isinstance(datafiles, DataFile):
-            self.datafiles.append(datafiles)
-
-    def load_from_folder(self, data_folder_path, csv_separator=" ", filename_var_separator="|", skip_lines=0):
+        with self._watch_lock:
+            if isinstance(datafiles, list):
+                for datafile in datafiles:
+                    assert(isinstance(datafile, DataFile))
+                    self.datafiles.append(datafile)
+                    self._settings_index.add(datafile)
+                    self._track_payload(datafile)
+            elif isinstance(datafiles, DataFile):
+                self.datafiles.append(datafiles)
+                self._settings_index.add(datafiles)
+                self._track_payload(datafiles)
+
+    def _track_payload(self, datafile: DataFile):
+        datafile._payload_cache = self.payload_cache
+        datafile._touch()
+
+    def _untrack_payload(self, datafile: DataFile):
+        r"""
+        Stops counting the data of a file that leaves the database, so the cache doesn't keep it alive
         """
-            Load all CSV files form the given folder
+        self.payload_cache.discard(datafile)
+        datafile._payload_cache = None
+
+    def set_payload_max_bytes(self, max_bytes):
+        r"""
+        Changes the memory budget of the columns loaded by the files of the database, `None` means no budget
         """
-        print("Querying available CSV files")
-        filepaths = list(Path(data_folder_path).rglob("*.csv"))
+        self.payload_cache.set_max_bytes(max_bytes)
 
-        start = time.perf_counter()
-        current_elapsed_time = 0
-        self.datafiles = []
-        N = len(filepaths)
-
-        print("Loading {} CSV files in database".format(N))
-        for index, filepath in enumerate(filepaths):
-            self.datafiles.append(
-                DataFile(
-                    str(filepath),
-                    csv_separator=csv_separator,
-                    filename_var_separator=filename_var_separator,
-                    skip_lines=skip_lines
-                )
-            )
-            new_elapsed_time = int(time.perf_counter() - start)
-            if new_elapsed_time != current_elapsed_time:
-                current_elapsed_time = new_elapsed_time
-                print("  Progress = {:.0f} %".format(100*(index+1)/N))
+    def reindex(self):
+        r"""
+        Rebuilds the index used by `filter_datafiles()` and the table used by `query()`, needed only if the
+        `sim_settings` or variables of files already in the database have been changed (e.g. with `DataFile.add_sim_setting()`)
+        """
+        with self._watch_lock:
+            self._settings_index = SettingsIndex(self.datafiles)
+            self._settings_table = None
+
+    def _get_settings_table(self) -> SettingsTable:
+        # the table follows the order of `self.datafiles`, which can be changed from outside
+        table, datafiles = self._settings_table, self.datafiles
+        if table is None or table.datafiles != datafiles:
+            table = SettingsTable(datafiles)
+            self._settings_table = table
+        return table
+
+    def query(self, conditions: dict = None, return_indexes: bool = False, **kwargs) -> Union[List[DataFile], np.ndarray]:
+        r"""
+        Returns the files whose sim settings and scalar variables match all the given conditions, evaluated
+        on whole columns of the settings table of the database rather than file by file, e.g.
+
+            database.query(wind_speed=Range(2, 5), temp=25)
+            database.query({"solver type": Prefix("implicit"), "mesh": OneOf(["coarse", "fine"])})
+
+        Parameters
+        ----------
+
+        conditions : dict or None
+            Maps setting or variable names to predicates: `Range`, `Equals`, `Prefix`, `OneOf` from `csv_manager.table`.
+            Lists, tuples and sets are shorthands for `OneOf`, other values for `Equals`.
+            Files that don't have a setting don't match any condition on it.
+
+        return_indexes : bool
+            Return the indexes of the matching files in `self.datafiles`, as a numpy array, instead of the files
 
+        kwargs :
+            More conditions, for names that are valid python identifiers
+        """
+        table = self._get_settings_table()
+        mask = np.ones(len(table), dtype=bool)
+        for name, condition in {**(conditions or dict()), **kwargs}.items():
+            mask &= as_predicate(condition).mask(table, name)
+
+        indexes = np.flatnonzero(mask)
+        if return_indexes:
+            return indexes
+        return [table.datafiles[index] for index in indexes.tolist()]
+
+    def settings_column(self, name: str, data_type: str = "float") -> np.ndarray:
+        r"""
+        Returns the values of the sim setting or variable `name` for all the files of `self.datafiles`, in the same
+        order, as a read-only array: "float" gives NaN for missing values, "string" gives empty strings
+        """
+        table = self._get_settings_table()
+        if data_type == "float":
+            return table.numeric(name)
+        elif data_type == "string":
+            return table.strings(name)[0]
+        raise ValueError("`data_type` should be either \"float\" or \"string\"")
+
+    def load_from_folder(self, data_folder_path, csv_separator=" ", filename_var_separator="|", skip_lines=0,
+                         workers: Optional[int] = None, executor: str = "thread",
+                         progress_callback: Optional[Callable[[int, int], None]] = print_progress,
+                         progress_interval: float = 1.0, catalog: Union[bool, str, Path] = False,
+                         full_metadata_scan: bool = False, reader: str = "csv", sidecar: bool = False):
+        r"""
+            Load all CSV files form the given folder, ".csv" files and compressed ".csv.gz", ".csv.xz" and ".csv.zst" files
+
+            Parameters
+            ----------
+
+            workers : int or None
+                Number of workers that read the headers and metadata of the files concurrently.
+                `None` or 1 loads the files one after the other.
+
+            executor : str
+                "thread" or "process", the kind of pool used when `workers` > 1. Threads are best
+                when the files are on a slow (e.g. network) file system, processes when parsing dominates.
+
+            progress_callback : callable or None
+                Called as `progress_callback(loaded_count, total_count)` when loading starts, then at most
+                once every `progress_interval` seconds, and when loading is done. `None` disables progress reporting.
+
+            catalog : bool, str or Path
+                Whether to keep the metadata of the files in a persistent `Catalog`, so that later calls only read
+                the files that are new or that changed. `True` puts the catalog in `data_folder_path`,
+                a path can also be given to put it elsewhere (e.g. when the data folder is read-only).
+
+            full_metadata_scan : bool
+                Read the whole files when looking for their sim settings and scalar results, see `DataFile`.
+
+            reader : str
+                The backend the DataFile objects use to read their data, "csv" or "mmap", see `DataFile`.
+
+            sidecar : bool
+                Whether the DataFile objects keep a binary cache of their parsed data next to their CSV file, see `DataFile`.
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError("`executor` should be either \"thread\" or \"process\"")
+
+        # changes found by `watch()` meanwhile are applied once the folder is loaded, to the new list of files
+        with self._watch_lock:
+            datafile_options = dict(csv_separator=csv_separator, filename_var_separator=filename_var_separator,
+                                    skip_lines=skip_lines, full_metadata_scan=full_metadata_scan, reader=reader,
+                                    sidecar=sidecar)
+            load = _FolderLoad(data_folder_path, datafile_options, progress_callback, progress_interval)
+            load.report_progress(force=True)
+            load.use_catalog(catalog)
+            to_parse = load.to_parse
+
+            try:
+                if workers and workers > 1 and len(to_parse) > 1:
+                    pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+                    with pool_class(max_workers=workers) as pool:
+                        # processes get files in chunks to amortize the pickling overhead
+                        chunksize = 1 if executor == "thread" else max(1, min(256, len(to_parse) // (4 * workers)))
+                        parsed_datafiles = pool.map(_load_datafile, [load.filepaths[index] for index in to_parse],
+                                                    [datafile_options] * len(to_parse), chunksize=chunksize)
+                        for index, datafile in zip(to_parse, parsed_datafiles):
+                            load.add_parsed(index, datafile)
+                else:
+                    for index in to_parse:
+                        load.add_parsed(index, _load_datafile(load.filepaths[index], datafile_options))
+            finally:
+                load.close_catalog()
+
+            if not to_parse:
+                load.report_progress()
+            self._replace_datafiles(load, self.datafiles)
+
+    async def aload_from_folder(self, data_folder_path, csv_separator=" ", filename_var_separator="|", skip_lines=0,
+                                concurrency: int = 4, progress_callback: Optional[Callable[[int, int], None]] = None,
+                                progress_interval: float = 1.0, catalog: Union[bool, str, Path] = False,
+                                full_metadata_scan: bool = False, reader: str = "csv", sidecar: bool = False):
+        r"""
+        Async counterpart of `load_from_folder()`, that doesn't block the event loop: the files are read by the executor
+        of the async API (see `csv_manager.aio`), at most `concurrency` at once, and `progress_callback` is called from
+        the event loop. It doesn't report progress by default.
+
+        The files that `watch()` adds, updates or removes while the folder is being loaded are added, updated or removed
+        in the loaded files too. The other parameters are the ones of `load_from_folder()`.
+        """
+        datafile_options = dict(csv_separator=csv_separator, filename_var_separator=filename_var_separator,
+                                skip_lines=skip_lines, full_metadata_scan=full_metadata_scan, reader=reader,
+                                sidecar=sidecar)
+        previous_datafiles = list(self.datafiles)
+        load = await run_blocking(_FolderLoad, data_folder_path, datafile_options, progress_callback, progress_interval)
+        load.report_progress(force=True)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def parse(index):
+            try:
+                datafile = await run_blocking(_load_datafile, load.filepaths[index], datafile_options)
+            finally:
+                semaphore.release()
+            load.add_parsed(index, datafile)
+
+        pending = set()
+        try:
+            await run_blocking(load.use_catalog, catalog)
+            for index in load.to_parse:
+                await semaphore.acquire()
+                pending.add(asyncio.ensure_future(parse(index)))
+                done = set(task for task in pending if task.done())
+                pending -= done
+                for task in done:
+                    # raises the error of a file that couldn't be loaded
+                    task.result()
+            await asyncio.gather(*pending)
+            pending.clear()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await run_blocking(load.close_catalog)
+
+        if not load.to_parse:
+            load.report_progress()
+
+        def replace_datafiles():
+            with self._watch_lock:
+                self._replace_datafiles(load, previous_datafiles)
+        await run_blocking(replace_datafiles)
+
+    def _replace_datafiles(self, load: _FolderLoad, previous_datafiles: List[DataFile]):
+        r"""
+        Replaces the files of the database by the files loaded by `load`, called with `_watch_lock` held.
+        The files that have been added to or removed from the database since it had `previous_datafiles`, by `watch()`,
+        replace or remove the loaded files that have the same path.
+        """
+        previous_ids = set(id(datafile) for datafile in previous_datafiles)
+        current_ids = set(id(datafile) for datafile in self.datafiles)
+        added_datafiles = [datafile for datafile in self.datafiles if id(datafile) not in previous_ids]
+        changed_paths = set(os.path.abspath(datafile.filepath) for datafile in previous_datafiles if id(datafile) not in current_ids)
+        changed_paths.update(os.path.abspath(datafile.filepath) for datafile in added_datafiles)
+        datafiles = [datafile for datafile in load.datafiles if os.path.abspath(datafile.filepath) not in changed_paths]
+
+        for datafile in self.datafiles:
+            self._untrack_payload(datafile)
+        self.datafiles = datafiles + added_datafiles
         self.datafiles.sort()
+        for datafile in self.datafiles:
+            datafile._payload_cache = self.payload_cache
+        self._settings_index = SettingsIndex(self.datafiles)
+        self._settings_table = None
+        self._data_folder_path = load.data_folder_path
+        self._datafile_options = load.datafile_options
+
+    def watch(self, data_folder_path=None, debounce: float = 1.0, poll_interval: float = 2.0, backend: str = "auto") -> FolderWatcher:
+        r"""
+        Keeps the database up to date with the CSV files of `data_folder_path` from a background thread: files that appear
+        are added, files that change are loaded again and files that disappear are removed, along with their entries
+        in the index of `filter_datafiles()` and the table of `query()`. Subscribers registered with `subscribe()`
+        get notified of each change. Call `stop_watching()` to stop.
+
+        Parameters
+        ----------
+
+        data_folder_path : str, Path or None
+            The folder to watch, `None` watches the folder of the last `load_from_folder()` call. New files are loaded
+            with the options of that call.
+
+        debounce : float
+            Number of seconds a file has to stay unchanged before it gets loaded, so files being written aren't read half-way
+
+        poll_interval : float
+            Number of seconds between two scans of the folder when inotify isn't available, see `FolderWatcher`
+
+        backend : str
+            "inotify", "polling" or "auto"
+        """
+        if data_folder_path is None:
+            data_folder_path = self._data_folder_path
+        if data_folder_path is None:
+            raise ValueError("No folder to watch: give `data_folder_path` or call `load_from_folder()` first")
+
+        self.stop_watching()
+        self._watcher = FolderWatcher(data_folder_path, self._apply_file_changes, debounce=debounce,
+                                      poll_interval=poll_interval, backend=backend)
+        self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def subscribe(self, callback: Callable[[str, DataFile], None]):
+        r"""
+        Registers `callback`, called as `callback(event, datafile)` each time `watch()` changes the database, with `event`
+        being "added", "updated" or "removed". It is called from the thread of the watcher.
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, DataFile], None]):
+        self._subscribers.remove(callback)
+
+    def _apply_file_changes(self, changes):
+        r"""
+        Adds, reloads or removes the files of `changes`, the list of `(filepath, signature)` pairs given by `FolderWatcher`
+        """
+        events = []
+        with self._watch_lock:
+            datafiles_by_path = {os.path.abspath(datafile.filepath): datafile for datafile in self.datafiles}
+            # readers of the current list and index, e.g. `filter_datafiles()` from another thread, aren't disturbed:
+            # copies are updated and swapped in at the end
+            datafiles = list(self.datafiles)
+            settings_index = self._settings_index.copy()
+
+            for filepath, signature in changes:
+                previous_datafile = datafiles_by_path.get(os.path.abspath(filepath))
+                datafile = None
+                if signature is not None:
+                    try:
+                        datafile = _load_datafile(filepath, self._datafile_options)
+                    except Exception as error:
+                        warnings.warn("Could not load \"{}\": {}".format(filepath, error))
+                        continue
+
+                if previous_datafile is not None:
+                    datafiles.remove(previous_datafile)
+                    if previous_datafile in settings_index:
+                        settings_index.remove(previous_datafile)
+                    self._untrack_payload(previous_datafile)
+
+                if datafile is not None:
+                    insort(datafiles, datafile)
+                    settings_index.add(datafile)
+                    self._track_payload(datafile)
+                    events.append(("added" if previous_datafile is None else "updated", datafile))
+                elif previous_datafile is not None:
+                    events.append(("removed", previous_datafile))
+
+            self.datafiles = datafiles
+            self._settings_index = settings_index
+            self._settings_table = None
+
+        for event, datafile in events:
+            for callback in list(self._subscribers):
+                callback(event, datafile)
 
     def file_selection_prompt(self, already_selected_files : List[DataFile] = list()) -> DataFile :
 
@@ -108,7 +572,7 @@ class Database:
 
         keywords = []
         filter_dict = {}
-        available_files = self.datafiles
+        available_files = list(self.datafiles)
 
         while True:
             print("#################################")
@@ -119,7 +583,7 @@ class Database:
             if already_selected_files:
                 self.compute_unique_pars(already_selected_files)
                 self.sort_vs_unique_pars(already_selected_files)
-            elif len(available_files) <= 50:
+            else:
                 self.compute_unique_pars(available_files)
                 self.sort_vs_unique_pars(available_files)
 
@@ -159,7 +623,7 @@ class Database:
             elif chosen_index == "filter clear":
                 keywords.clear()
                 filter_dict.clear()
-                available_files = self.datafiles
+                available_files = list(self.datafiles)
             elif chosen_index.startswith("filter"):
                 print("Parsing: " + chosen_index[7:])
                 extra_keywords, extra_filters = parse_filter_command(chosen_index[7:])
@@ -179,29 +643,44 @@ class Database:
                     print("Input not recognized, please try again")
 
     def filter_datafiles(self, datafiles, keywords: Union[list, str] = [], filter_dict : dict = dict()) -> List[DataFile]:
-        filtered_datafiles = []
+        r"""
+        Returns the files of `datafiles`, in the same order, whose `base_name` contains all the `keywords` and whose
+        `sim_settings` values start with the values given in `filter_dict`. The files of the database are looked up
+        in its index, other files are checked one by one.
+        """
 
         if isinstance(keywords, str):
             keywords=[keywords]
 
-        for datafile in datafiles:
-            if all([keyword in datafile.base_name for keyword in keywords]) and \
+        # the watcher of `watch()` can swap the index from another thread
+        settings_index = self._settings_index
+        matching_files = settings_index.query(keywords, filter_dict)
+
+        def matches(datafile):
+            return all([keyword in datafile.base_name for keyword in keywords]) and \
                 set(filter_dict.keys()) <= set(datafile.sim_settings.keys()) and \
-                all([datafile.sim_settings[filter_key].startswith(filter_val) for filter_key, filter_val in filter_dict.items()]):
+                all([datafile.sim_settings[filter_key].startswith(filter_val) for filter_key, filter_val in filter_dict.items()])
 
-                filtered_datafiles.append(datafile)
+        filtered_datafiles = [datafile for datafile in datafiles if
+                              (datafile in matching_files if datafile in settings_index else matches(datafile))]
 
-        for filtered_datafile in filtered_datafiles:
-            filtered_datafile.compute_unique_pars(filtered_datafiles)
+        self.compute_unique_pars(filtered_datafiles)
 
         return filtered_datafiles
 
     def compute_unique_pars(self, datafiles_subset : list):
         """
-        Computes the unique parameters for each datafile among the datafiles in datafiles_subset
+        Computes the unique parameters for each datafile among the datafiles in datafiles_subset:
+        the sim settings (key, value) pairs that are not shared by all the datafiles of the subset.
+        Runs in O(total number of sim settings) by counting each (key, value) pair once.
         """
+        counts = Counter()
         for datafile in datafiles_subset:
-            datafile.compute_unique_pars(datafiles_subset)
+            counts.update(datafile.sim_settings.items())
+
+        subset_size = len(datafiles_subset)
+        for datafile in datafiles_subset:
+            datafile.unique_pars = {key: val for key, val in datafile.sim_settings.items() if counts[(key, val)] != subset_size}
 
     def sort_vs_unique_pars(self, datafiles):
         datafiles.sort(key=lambda datafile: len(datafile.unique_pars))
@@ -221,8 +700,7 @@ class Database:
                 The name of the sim_setting that is permitted to vary, all the others will be fixed (per newly created DataFile)
 
             match_basename : bool
-                The desired column name to retrieve, or mathematical expression involving the dataset's column
-                names to calculate and return
+                Whether files need to have the same `base_name` to be regrouped in the same newly created DataFile
 
             datafiles_subset : list[DataFile] or None
                 a subset of DataFile objects to look into, if set to None, all the DataFiles loaded in the Database instance
@@ -231,81 +709,162 @@ class Database:
             Returns
             -------
 
-            A list of `type` containing the result of `expr`
+            A list of DataFile objects, one per group of files, with a column containing the values of `sim_setting_name`,
+            sorted numerically, and one column per scalar result.
+        """
+        return self.slice_many([sim_setting_name], match_basename, datafiles_subset)
+
+    def aggregate(self, datafiles: List[DataFile] = None, x_expr: str = "", y_expr: str = "",
+                  reducer: Union[str, float, List[Union[str, float]]] = "mean", grid: Union[int, np.ndarray, None] = None,
+                  workers: Optional[int] = None, executor: str = "thread"):
+        r"""
+        Evaluates `y_expr` against `x_expr` in each file, interpolates the resulting curves onto a common x grid,
+        and reduces them point by point across the files, e.g. the mean and std of `speed` vs `time` over a seed sweep:
+
+            grid, stats = database.aggregate(database.query(wind_speed=2.4), "time", "speed", reducer=["mean", "std"], grid=200)
+
+        The expressions are evaluated with `DataFile.get()`, so they can use the `num_vars` of each file as constants.
+        Files are processed one at a time by each worker: the columns a file has to read are dropped once its curve
+        is computed, and only the curves interpolated on the grid are kept.
+
+        Parameters
+        ----------
+
+        datafiles : list[DataFile] or None
+            The files to aggregate, `self.datafiles` by default
+
+        x_expr, y_expr : str
+            Column names or mathematical expressions of column names, as given to `DataFile.get()`
+
+        reducer : str, float or list of them
+            "mean", "std", "var", "min", "max", "sum", "count" (number of files that have a value at each point),
+            "median" or a quantile given as a float between 0 and 1. NaN values are ignored. The pointwise reducers
+            ("mean", ..., "count") are accumulated file by file, the median and quantiles need the curves of all the files.
+
+        grid : int, array or None
+            The x values to align the curves on. An int gives that many evenly spaced points over the x range covered by
+            the files (which needs a first pass over `x_expr`), `None` takes the sorted x values of the first file.
+            Curves are not extrapolated: a file has no value outside of its own x range.
+
+        workers : int or None
+            Number of files processed in parallel
+
+        executor : str
+            "thread" or "process", the kind of pool used when `workers` > 1
+
+        Returns
+        -------
+
+        A `(grid, result)` tuple: `result` is an array with a value per point of `grid`,
+        or a dict that maps each reducer to its array when `reducer` is a list.
+        """
+        if datafiles is None:
+            datafiles = self.datafiles
+        datafiles = list(datafiles)
+        if not datafiles:
+            raise ValueError("No files to aggregate")
+
+        reducers = reducer if isinstance(reducer, (list, tuple)) else [reducer]
+        for name in reducers:
+            if not (name in POINTWISE_REDUCERS or name == "median" or (isinstance(name, float) and 0 <= name <= 1)):
+                raise ValueError("Unknown reducer: {0}".format(name))
+
+        if grid is None:
+            grid = np.unique(_evaluated(datafiles[0], x_expr, x_expr)[0])
+        elif np.ndim(grid) == 0:
+            ranges = [x_range for x_range in _parallel_map(_x_range, [datafiles, [x_expr] * len(datafiles)], workers, executor)
+                      if x_range is not None]
+            if not ranges:
+                raise ValueError("None of the files has values for `x_expr`")
+            grid = np.linspace(min(low for low, high in ranges), max(high for low, high in ranges), int(grid))
+        else:
+            grid = np.asarray(grid, dtype=np.float64)
+
+        stats = PointwiseStats(len(grid))
+        keep_curves = any(name not in POINTWISE_REDUCERS for name in reducers)
+        curves = []
+        for curve in _parallel_map(_aligned_curve, [datafiles, [x_expr] * len(datafiles), [y_expr] * len(datafiles),
+                                                    [grid] * len(datafiles)], workers, executor):
+            stats.update(curve)
+            if keep_curves:
+                curves.append(curve)
+
+        results = dict()
+        for name in reducers:
+            if name in POINTWISE_REDUCERS:
+                results[name] = getattr(stats, {"var": "variance"}.get(name, name)).copy()
+            else:
+                quantile = 0.5 if name == "median" else name
+                with warnings.catch_warnings():
+                    # points where no file has a value give NaN
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    results[name] = np.nanquantile(np.array(curves), quantile, axis=0)
+
+        if isinstance(reducer, (list, tuple)):
+            return grid, results
+        return grid, results[reducer]
+
+    def slice_many(self, sim_setting_names: List[str], match_basename: bool=True, datafiles_subset: List[DataFile]=None):
+        r"""
+            Same as `slice()`, but with several sim settings permitted to vary at once: files are regrouped when they share
+            all their `sim_settings` except the ones in `sim_setting_names`. The rows of each newly created DataFile are
+            sorted by the values of `sim_setting_names`, compared numerically when possible.
         """
         if datafiles_subset == None:
             datafiles_subset = self.datafiles
 
-        # first: calcualte a List of List of Datafiles
-        slicings = []
-        n = len(datafiles_subset)
-        remaining_datafiles = set(datafiles_subset)
-        while len(remaining_datafiles) >= 2:
-            file1 = remaining_datafiles.pop()
+        sliced_names = set(sim_setting_names)
 
-            #pick a file that contains `sim_setting_name` in it sim_settings keys
-            if sim_setting_name not in file1.sim_settings.keys():
+        # First: group the files in one pass, with the fixed sim settings as key
+        groups = dict()
+        for datafile in datafiles_subset:
+            if not sliced_names <= datafile.sim_settings.keys():
                 continue
+            fixed_settings = frozenset((key, val) for key, val in datafile.sim_settings.items() if key not in sliced_names)
+            group_key = (datafile.base_name if match_basename else None, fixed_settings)
+            groups.setdefault(group_key, []).append(datafile)
 
-            data_slice = []
-            for file2 in remaining_datafiles:
-                if (not match_basename or file1.base_name == file2.base_name) and \
-                    set(file1.sim_settings.keys()) == set(file2.sim_settings.keys()) and \
-                    all([key == sim_setting_name or file1.sim_settings[key] == file2.sim_settings[key] for key in file1.sim_settings.keys()]):
-                    data_slice.append(file2)
-            if data_slice:
-                for file in data_slice:
-                    remaining_datafiles.remove(file)
-                data_slice.append(file1)
-                slicings.append(data_slice)
-        # Done
-        #
-        # Second: create new datafiles from each DataFile list
-
-        new_datafiles = []
-        for slicing in slicings:
-            file = slicing[0]
-            sim_settings = file.sim_settings.copy()
-            del sim_settings[sim_setting_name]
-            parent_folder = str(Path(file.filepath).parent)
-
-            columns = dict()
+        # Second: create new datafiles from each group that has more than one file
 
-            # Define all possible key values and load scalar values
-            all_keys = set()
-            for file in slicing:
-                file.load_scalar_results(self.result_names_col, self.result_values_col)
-                all_keys.update(set(file.sim_scalar_results.keys()))
+        def sort_key(value):
+            # numerical values first, sorted numerically, then the others sorted as strings
+            try:
+                return (0, float(value), "")
+            except (TypeError, ValueError):
+                return (1, 0., str(value))
 
-            for key in all_keys:
-                columns[key] = []
+        new_datafiles = []
+        for group in groups.values():
+            if len(group) < 2:
+                continue
 
-            #initialise columns[sim_setting_name] if not present in all_keys
-            sim_setting_name_already_present = True
-            if sim_setting_name not in all_keys:
-                sim_setting_name_already_present = False
-                columns[sim_setting_name] = []
+            group.sort(key=lambda datafile: [sort_key(datafile.sim_settings[name]) for name in sim_setting_names])
 
-            for file in slicing:
-                #Append empty values for non exisiting keys
-                sub_keys = file.sim_scalar_results.keys()
-                diff = all_keys - sub_keys
-                for key in diff:
-                    columns[key].append("")
+            file = group[0]
+            sim_settings = {key: val for key, val in file.sim_settings.items() if key not in sliced_names}
+            parent_folder = str(Path(file.filepath).parent)
 
-                # append existing values
-                for key, val in file.sim_scalar_results.items():
-                    columns[key].append(val)
+            if self.result_names_col and self.result_values_col:
+                scalar_results = [datafile.get_scalar_results(self.result_names_col, self.result_values_col) for datafile in group]
+            else:
+                # read when the files got loaded, or taken from the catalog
+                scalar_results = [datafile._metadata_scalar_results() for datafile in group]
 
-                # append the value of `sim_setting_name`
-                if not sim_setting_name_already_present:
-                    columns[sim_setting_name].append(file.sim_settings[sim_setting_name])
+            columns = {name: [datafile.sim_settings[name] for datafile in group] for name in sim_setting_names}
+            all_keys = set()
+            for results in scalar_results:
+                all_keys.update(results.keys())
+            for key in sorted(all_keys - sliced_names):
+                columns[key] = [results.get(key) for results in scalar_results]
 
-            filepath = parent_folder + "/" + file.base_name + "_vs_" + sim_setting_name + dict_to_string(sim_settings) + ".csv"
-            datafile = DataFile(filepath)
+            filepath = parent_folder + "/" + file.base_name + "_vs_" + "_".join(sim_setting_names) + \
+                dict_to_string(sim_settings, separator=file.filename_var_separator) + ".csv"
+            datafile = DataFile(filepath, filename_var_separator=file.filename_var_separator)
 
             for key, vals in columns.items():
                 datafile.set(key, vals)
+            for key, val in sim_settings.items():
+                datafile.add_sim_setting(key, val)
 
             new_datafiles.append(datafile)
 
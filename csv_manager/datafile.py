@@ -1,111 +1,295 @@
-import csv
-from py_expression_eval import Parser
+import os
+import sys
+import threading
 from pathlib import Path
-from .writer import write
+from .writer import write, AppendWriter
+from .compressed import strip_csv_extension, compression_of
+from .columns import identity, get_complex, is_complex, get_integer, is_integer, get_float, is_float
+from .columns import parse_column, make_column, column_to_strings, concat_columns, cast_column, DATA_TYPES
+from .columns import split_mixed_column, column_type, format_column
+from .expression import CompiledExpression
+from .reader import MetadataScanner, read_columns, read_columns_mmap, iter_column_chunks
+from .reader import complete_size, data_offset, read_appended_rows, read_identity, continues_identity
+from .sidecar import Sidecar
+from .streaming import StreamStats, stream_stats, stream_histogram, DEFAULT_CHUNK_ROWS
+from .cache import LRUCache, DEFAULT_RESULT_CACHE_MAX_BYTES, DEFAULT_EXPRESSION_CACHE_MAX_ENTRIES
+from .aio import run_blocking, run_shared
 import numpy as np
 
 import typing
 
-def identity(val):
-    return val
-
-def get_complex(val):
-    if is_complex(val):
-        return complex(val)
-    else:
-        return complex("nan")
-
-def is_complex(s):
-    try:
-        complex(s)
-        return True
-    except ValueError:
-        return False
-
-def get_integer(val):
-    if is_integer(val):
-        return int(val)
-    else:
-         raise ValueError("Casting a non integer value: ", val)
-
-def is_integer(s):
-    try:
-        int(s)
-        return True
-    except ValueError:
-        return False
-
-def get_float(val):
-    if is_float(val):
-        return float(val)
-    else:
-        return float("nan")
-
-def is_float(s):
-    try:
-        float(s)
-        return True
-    except ValueError:
-        return False
+# Rough size of the python strings held by the object columns, used to estimate the memory used by the data of a file
+OBJECT_CELL_BYTES = 56
+
+def _interned(mapping: dict) -> dict:
+    r"""
+    Returns a copy of `mapping` whose string keys and values are interned: the names and values of the settings
+    are shared by all the files of a database instead of being stored once per file
+    """
+    return {sys.intern(key): sys.intern(val) if isinstance(val, str) else val for key, val in mapping.items()}
+
+# Column name to index mappings shared by the files that have the same columns, see `_shared_column_names()`
+_column_name_maps = dict()
+_column_name_maps_lock = threading.Lock()
+
+def _shared_column_names(mapping: dict) -> dict:
+    r"""
+    Returns the mapping of column names to indexes equal to `mapping` shared by all the files that have the same columns,
+    usually all the files of a database. It is copied by the DataFile objects that change it.
+    """
+    key = tuple(mapping.items())
+    with _column_name_maps_lock:
+        if key not in _column_name_maps:
+            _column_name_maps[key] = _interned(mapping)
+        return _column_name_maps[key]
 
 class DataFile:
     r"""
         A class that represents a single CSV file, can load CSV files with arbitrary separators. It can
         return separately any column of the file and any mathematical combinations of its columns.
+        Files compressed with gzip, xz or zstd (".csv.gz", ".csv.xz" or ".csv.zst") are read and saved compressed.
     """
 
-    def __init__(self, filepath="", filename_var_separator="|", csv_separator=" ", skip_lines=0):
+    # A Database can hold a very large number of DataFile objects: their attributes are slots,
+    # and what doesn't depend on the file is shared by the class. Other attributes, e.g. per-instance values
+    # of the class constants below, go in a `__dict__` that is only created when one is set
+    __slots__ = ("csv_separator", "_filepath", "filename_var_separator", "sim_settings", "vars", "_num_vars",
+                 "_unique_pars", "base_name", "file_exists", "skip_lines", "full_metadata_scan", "reader", "sidecar",
+                 "columns", "column_name_to_index", "_pending_values", "_text_cells", "_cache_max_bytes",
+                 "_result_cache", "_is_data_loaded", "_column_count", "_has_unsaved_changes", "_payload_cache",
+                 "_load_lock", "_parsed_bytes", "_parsed_identity", "_changed_columns", "__dict__", "__weakref__")
+
+    results_possible_col_names = (("result_name", "result_value"),)
+    settings_possible_col_names = (("sim_setting_name", "sim_setting_value"),
+                                   ("setting_name", "setting_value"))
+
+    # Compiled expressions, keyed by expression string, they don't depend on the file
+    _expression_cache = LRUCache(max_entries=DEFAULT_EXPRESSION_CACHE_MAX_ENTRIES)
+    _expression_cache_lock = threading.Lock()
+    # Guards the creation of the per-file load locks, which are only created when needed
+    _load_lock_creation_lock = threading.Lock()
+
+    def __init__(self, filepath="", filename_var_separator="|", csv_separator=" ", skip_lines=0,
+                 cache_max_bytes=DEFAULT_RESULT_CACHE_MAX_BYTES, metadata=None, full_metadata_scan=False,
+                 reader="csv", sidecar=False):
+        r"""
+        Parameters
+        ----------
+
+        sidecar : bool
+            Whether to keep a binary cache of the parsed file next to it, see `Sidecar`. The metadata and the
+            columns get loaded from it, memory-mapped, instead of being parsed from the text as long as the file doesn't change.
+
+        reader : str
+            The backend that reads the data of the file: "csv" uses python's csv module, "mmap" memory-maps the
+            file and parses numerical columns straight into numpy arrays, which is much faster on big files.
+            "mmap" falls back to "csv" for files it can't handle, e.g. with quoted fields.
+
+        full_metadata_scan : bool
+            The sim settings and scalar results tables are expected right after the header: reading them stops
+            once their name columns stay empty. Set to True to read the whole file when their layout is unknown.
+
+        metadata : dict or None
+            The metadata of the file, as returned by `get_metadata()`, e.g. from a `Catalog`. When given,
+            the file isn't read until its data is requested.
+
+        cache_max_bytes : int or None
+            Memory budget of the cache of expression results returned by `get()`, the least recently
+            used results get evicted first. `None` means no budget, 0 disables the cache.
+        """
         self.csv_separator = csv_separator
-        self.filepath = Path(filepath)
-        self.filename = self.filepath.name
+        self.filepath = filepath
         self.filename_var_separator = filename_var_separator
         self.sim_settings = dict()
         self.vars = dict()
-        self.num_vars = dict()
-        self.unique_pars = dict()
+        # computed from `vars` and copied from `sim_settings` when first used, see the properties
+        self._num_vars = None
+        self._unique_pars = None
         self.base_name = ""
         self.file_exists = False
         self.skip_lines = skip_lines
+        self.full_metadata_scan = full_metadata_scan
+        if reader not in ("csv", "mmap"):
+            raise ValueError("`reader` should be either \"csv\" or \"mmap\"")
+        self.reader = reader
+        self.sidecar = sidecar
 
         self.columns = []
         self.column_name_to_index = dict()
-
+        self._pending_values = dict()
+        # Text of the non numerical cells of "mixed" columns, stored as float with NaN in those cells: index -> (rows, texts)
+        self._text_cells = dict()
+        # Indexes of the columns changed since they were read from the file: the text of their cells
+        # can't be read again from it, see `_read_texts()`
+        self._changed_columns = frozenset()
+
+        # Results of `get()`, keyed by (expr, data_type), the cache is created on first use
+        self._cache_max_bytes = cache_max_bytes
+        self._result_cache = None
+
+        # Columns are loaded on demand: `self.columns` holds None for the columns of the file not loaded yet,
+        # `_column_count` is the number of columns in the file, known after the first load
         self._is_data_loaded = False
+        self._column_count = None
         self._update_base_name()
 
-        self.results_possible_col_names = [("result_name", "result_value")]
-        self.settings_possible_col_names = [("sim_setting_name", "sim_setting_value"),
-                                            ("setting_name", "setting_value")]
+        # Set by the Database that holds the file, see `PayloadCache`: loaded columns can be dropped to stay within
+        # a memory budget, unless they have been changed without being saved to disk
+        self._payload_cache = None
+        self._has_unsaved_changes = False
+        # Serializes the loads of the columns, so concurrent readers of the file don't parse it twice
+        self._load_lock = None
+        # Size of the file the loaded columns were read from, where `refresh()` starts reading the appended rows,
+        # None when unknown, e.g. when the file changed while it was read
+        self._parsed_bytes = None
+        # What identifies the file the loaded columns were read from, see `read_identity()`, None when unknown
+        self._parsed_identity = None
+
+        if metadata is not None:
+            self.file_exists = True
+            self._set_metadata(metadata)
 
-        if self.filepath.is_file():
+        elif self.filepath.is_file():
             self.file_exists = True
-            self._read_column_names()
 
-            self._populate_sim_settings()
-            self._populate_vars()
+            sidecar = self._get_sidecar() if self.sidecar else None
+            metadata = sidecar.read_metadata(self.full_metadata_scan) if sidecar is not None else None
+            if metadata is not None:
+                self._set_metadata(metadata)
+            else:
+                signature = sidecar.signature() if sidecar is not None else None
+                self._read_metadata()
+                if sidecar is not None:
+                    sidecar.store_metadata(self.get_metadata(), self.full_metadata_scan, signature)
+
+    def __getstate__(self):
+        state = {name: getattr(self, name) for name in self.__slots__ if name not in ("__dict__", "__weakref__") and hasattr(self, name)}
+        state.update(self.__dict__)
+        # the payload cache belongs to the Database of this process, and locks can't be pickled
+        state["_payload_cache"] = None
+        state["_load_lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        # unpickled strings are new copies, e.g. from the workers of a process pool
+        self.column_name_to_index = _shared_column_names(self.column_name_to_index)
+        self.sim_settings = _interned(self.sim_settings)
+        if self._unique_pars is not None:
+            self._unique_pars = _interned(self._unique_pars)
+        self.vars = _interned(self.vars)
+        self.base_name = sys.intern(self.base_name)
+
+    def _get_sidecar(self) -> Sidecar:
+        return Sidecar(self.filepath, {"csv_separator": self.csv_separator, "skip_lines": self.skip_lines})
+
+    def get_metadata(self) -> dict:
+        r"""
+        Returns the metadata read from the file: its column names, sim settings and scalar variables.
+        It can be given back to the constructor to create the same DataFile without reading the file.
+        """
+        return {
+            "column_name_to_index": self.column_name_to_index.copy(),
+            "sim_settings": self.sim_settings.copy(),
+            "vars": self.vars.copy(),
+        }
+
+    def _set_metadata(self, metadata: dict):
+        self.column_name_to_index = _shared_column_names(metadata["column_name_to_index"])
+        self.sim_settings = _interned(metadata["sim_settings"])
+        self._unique_pars = None
+        self.vars = _interned(metadata["vars"])
+        self._populate_num_vars()
+
+    @property
+    def filepath(self) -> Path:
+        return Path(self._filepath)
+
+    @filepath.setter
+    def filepath(self, filepath):
+        # a string takes a fraction of the memory of a Path
+        self._filepath = os.fspath(filepath)
+
+    @property
+    def num_vars(self) -> dict:
+        r"""
+        The variables of the file that are numbers, as floats
+        """
+        if self._num_vars is None:
+            self._num_vars = dict()
+            for key, val in self.vars.items():
+                try:
+                    num_val = float(val)
+                    self._num_vars[key] = num_val
+                except:
+                    pass
+        return self._num_vars
+
+    @num_vars.setter
+    def num_vars(self, num_vars: dict):
+        self._num_vars = num_vars
+
+    @property
+    def unique_pars(self) -> dict:
+        r"""
+        The sim settings that tell the file apart from the others of a group of files, see `compute_unique_pars()`,
+        all of them until they get computed
+        """
+        if self._unique_pars is None:
+            self._unique_pars = self.sim_settings.copy()
+        return self._unique_pars
+
+    @unique_pars.setter
+    def unique_pars(self, unique_pars: dict):
+        self._unique_pars = unique_pars
+
+    @property
+    def filename(self) -> str:
+        return self.filepath.name
+
+    @filename.setter
+    def filename(self, filename: str):
+        r"""
+        Renames the file the DataFile gets saved to, in the same folder
+        """
+        self.filepath = self.filepath.with_name(filename)
 
     def _update_base_name(self):
-        extless_filename = self.filename
-        if extless_filename.endswith(".csv"):
-            extless_filename = extless_filename[:-4]
+        extless_filename = strip_csv_extension(self.filename)
 
         split = extless_filename.split(self.filename_var_separator)
 
-        self.base_name += split[0]
+        self.base_name = sys.intern(self.base_name + split[0])
+
+    def _read_metadata(self):
+        r"""
+        Reads the column names, the sim settings and the scalar results of the file with a single pass
+        over its first rows.
+        """
+        with MetadataScanner(self.filepath, self.csv_separator, self.skip_lines) as scanner:
+            self._read_column_names(scanner.read_header())
 
-    def _populate_sim_settings(self):
+            column_pairs = [pair for pair in self.results_possible_col_names + self.settings_possible_col_names
+                            if pair[0] in self.column_name_to_index and pair[1] in self.column_name_to_index]
+            index_pairs = [(self.column_name_to_index[name_col], self.column_name_to_index[val_col])
+                           for name_col, val_col in column_pairs]
+            scalar_tables = dict(zip(column_pairs, scanner.read_scalar_tables(index_pairs, self.full_metadata_scan)))
+
+        self._populate_sim_settings(scalar_tables)
+        self._populate_vars(scalar_tables)
+
+    def _populate_sim_settings(self, scalar_tables: dict):
 
         self.sim_settings = dict()
-        for name_col, val_col in self.settings_possible_col_names:
-            self.sim_settings.update(self._load_scalar_results(result_names_col=name_col, result_values_col=val_col))
+        for pair in self.settings_possible_col_names:
+            self.sim_settings.update(scalar_tables.get(pair, dict()))
 
         if not self.sim_settings:
             # Couldn't find sim settings in the file itself
             # We try to load them from the filename
 
-            extless_filename = self.filepath.name
-            if extless_filename.endswith(".csv"):
-                extless_filename = extless_filename[:-4]
+            extless_filename = strip_csv_extension(self.filepath.name)
 
             split = extless_filename.split(self.filename_var_separator)
 
@@ -118,27 +302,68 @@ class DataFile:
                     key, value = string.split("=")
                     self.sim_settings[key] = value
 
-        self.unique_pars = self.sim_settings.copy()
+        self.sim_settings = _interned(self.sim_settings)
+        self._unique_pars = None
 
     def add_sim_setting(self, name: str, value: str):
-        self.sim_settings[name] = value
+        # `unique_pars` starts as a copy of the sim settings read from the file
+        self.unique_pars
+        self.sim_settings[sys.intern(name)] = sys.intern(value) if isinstance(value, str) else value
+        self._set_num_var(name, value)
+
+    def _set_num_var(self, name: str, value):
+        self._invalidate_results([name])
         try:
             num_val = float(value)
             self.num_vars[name] = num_val
         except:
-            pass
-
+            self.num_vars.pop(name, None)
 
     def set_variable(self, name: str, value):
         r"""
         Temporarily set a variable inside this instance, this change is not saved to disk
-        when calling save_to_disk()
+        when calling save_to_disk(). Numerical variables can be used in the expressions given to `get()`
         """
         self.vars[name] = value
+        self._set_num_var(name, value)
+
+    def set_cache_max_bytes(self, max_bytes):
+        r"""
+        Changes the memory budget of the cache of expression results, `None` means no budget and 0 disables the cache
+        """
+        self._cache_max_bytes = max_bytes
+        if self._result_cache is not None:
+            self._result_cache.set_max_bytes(max_bytes)
+
+    def clear_cache(self):
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def _get_result_cache(self) -> LRUCache:
+        if self._result_cache is None:
+            self._result_cache = LRUCache(max_bytes=self._cache_max_bytes)
+        return self._result_cache
+
+    def _invalidate_results(self, column_names):
+        if self._result_cache is not None:
+            self._result_cache.invalidate(column_names)
+
+    @classmethod
+    def _compile(cls, expr: str) -> CompiledExpression:
+        r"""
+        Returns the compiled `expr`, from the expression cache shared by all the DataFile objects
+        """
+        with cls._expression_cache_lock:
+            expression = cls._expression_cache.get(expr)
+        if expression is None:
+            expression = CompiledExpression(expr)
+            with cls._expression_cache_lock:
+                cls._expression_cache.put(expr, expression)
+        return expression
 
     def __lt__(self, other):
-        stem = self.filename[:-4] # remove the trailing ".csv"
-        other_stem = other.filename[:-4]
+        stem = strip_csv_extension(self.filename)
+        other_stem = strip_csv_extension(other.filename)
         if stem.startswith(other_stem):
             return False
         elif stem.startswith(other_stem):
@@ -149,33 +374,31 @@ class DataFile:
     def get_variable(self, name: str):
         return self.vars[name]
 
-    def _read_column_names(self):
-
-        with open(self.filepath) as openFile:
-            reader = csv.reader(openFile, delimiter=self.csv_separator)
-
-            for i in range(self.skip_lines):
-                reader.__next__()
-
-            row_content = reader.__next__()
-
-            for col, val in enumerate(row_content):
-                col_name = val
-                if col_name:
-                    first = True
-                    while col_name in self.column_name_to_index:
-                        if first:
-                            col_name += "_"
-                            first = False
-                        col_name += "b"
-                    self.column_name_to_index[col_name] = col
+    def _read_column_names(self, row_content: list):
+
+        column_name_to_index = dict(self.column_name_to_index)
+        for col, val in enumerate(row_content):
+            col_name = val
+            if col_name:
+                first = True
+                while col_name in column_name_to_index:
+                    if first:
+                        col_name += "_"
+                        first = False
+                    col_name += "b"
+                column_name_to_index[col_name] = col
+        self.column_name_to_index = _shared_column_names(column_name_to_index)
 
     def move_to_folder(self, folder_path):
         r"""
             move file to new folder, the original file isn't moved nor deleted. a call to `save_to_disk()` is needed
             for the file to be saved in the new folder
         """
+        # the data has to be read from the original file before it gets saved to the new one
+        self._load_columns(None)
         self.filepath = Path(str(folder_path) + "/" + self.filename)
+        self._has_unsaved_changes = True
+        self._touch()
 
     def compute_unique_pars(self, datafiles):
         self.unique_pars.clear()
@@ -183,57 +406,156 @@ class DataFile:
             if not all([key in datafile.sim_settings.keys() and val == datafile.sim_settings[key] for datafile in datafiles]):
                 self.unique_pars[key] = val
 
-    def _load_data(self):
+    def _load_data(self, indexes=None):
         r"""
-        Loads the CSV file pointed by `csv_file` into memory. This step
-        should be done first before requesting any data from the file through
-        `get([...])`
+        Loads the columns of the CSV file given by their `indexes` into memory, `None` loads all the columns
+        that are not loaded yet. Each column gets parsed once into a typed numpy array.
 
         Parameters
         ----------
 
-        csv_file : str
-            The absolute or relative path to the file to load.
-
-        alias : str
-            The alias to give to the file, the data in the file can be accessed with it. If
-            the user loads two files and give the same alias for both, their data will be put
-            together: if two columns share the same name the last one loaded will have "_b"
-            appended to its name.
-
-        csv_separator : str
-            The separator string used to separate between columns at any given line in the
-            CSV file. The default is a blank space ' ' (even though the name CSV says otherwise)
-
+        indexes : list[int] or None
+            Indexes of the columns to load, indexes of columns already loaded or that
+            are not in the file are ignored.
         """
 
-        def extend_columns(new_column_num):
-            current_row_num = 0
-            if self.columns:
-                current_row_num = len(self.columns[0])
-                assert(all([len(column) == current_row_num for column in self.columns]))
+        if self._is_data_loaded:
+            return False
 
-            current_column_num = len(self.columns)
-            if new_column_num >= current_column_num:
-                self.columns += [ ["" for j in range(current_row_num)] for i in range(new_column_num - current_column_num)]
+        sidecar = self._get_sidecar() if self.sidecar else None
+        if self._column_count is None and sidecar is not None:
+            column_count = sidecar.column_count()
+            if column_count is not None:
+                self._column_count = column_count
+                self.columns = [None] * column_count
+
+        if self._column_count is None:
+            wanted_indexes = None if indexes is None else sorted(set(indexes))
+        elif indexes is None:
+            wanted_indexes = [index for index in range(self._column_count) if self.columns[index] is None]
+        else:
+            wanted_indexes = sorted(set(index for index in indexes if 0 <= index < self._column_count and self.columns[index] is None))
+
+        was_loaded = any(column is not None for column in self.columns)
+        if wanted_indexes and was_loaded and self._parsed_bytes is not None and not self._has_unsaved_changes and \
+           not continues_identity(self._parsed_identity):
+            # the file got rewritten since the loaded columns were read: they are read again along with the others
+            wanted_indexes = sorted(set(wanted_indexes).union(index for index, column in enumerate(self.columns) if column is not None))
+            self._unload_columns()
+            was_loaded = False
+
+        is_reading = wanted_indexes != []
+        size_before_read = complete_size(self.filepath) if is_reading else None
+        identity_before_read = read_identity(self.filepath) if is_reading else None
+        # the loaded columns may have been refreshed while the file grew, the others have to hold the same rows
+        same_rows = was_loaded and self._parsed_bytes is not None
+        if same_rows and self._parsed_bytes != size_before_read:
+            sidecar = None
+        # what gets parsed is only stored in the sidecar if the file doesn't change in the meantime
+        sidecar_signature = sidecar.signature() if sidecar is not None else None
+
+        if sidecar is not None and wanted_indexes and self._column_count is not None:
+            # Load what's available from the sidecar, parse the rest
+            for index in wanted_indexes:
+                column = sidecar.load_column(index)
+                if column is not None:
+                    self._store_column(index, column)
+            wanted_indexes = [index for index in wanted_indexes if self.columns[index] is None]
+
+        if wanted_indexes != []:
+            typed_columns = None
+            if same_rows:
+                cells = read_appended_rows(self.filepath, data_offset(self.filepath, self.skip_lines),
+                                           self.csv_separator, wanted_indexes, self._parsed_bytes)[0]
+                typed_columns = ({index: parse_column(column_cells) for index, column_cells in cells.items()}, self._column_count)
+            elif self.reader == "mmap":
+                typed_columns = read_columns_mmap(self.filepath, self.csv_separator, self.skip_lines, wanted_indexes)
+            if typed_columns is None:
+                cells, column_count = read_columns(self.filepath, self.csv_separator, self.skip_lines, wanted_indexes)
+                typed_columns = ({index: parse_column(column_cells) for index, column_cells in cells.items()}, column_count)
+            columns, column_count = typed_columns
+
+            if self._column_count is None:
+                # Columns named in the header exist even if they have no values
+                self._column_count = max([column_count] + [index + 1 for index in self.column_name_to_index.values()])
+                self.columns = [None] * self._column_count
+                row_count = max([len(column) for column in columns.values()], default=0)
+                for index in range(column_count, self._column_count):
+                    columns[index] = parse_column([""] * row_count)
+
+            columns = {index: column for index, column in columns.items() if index < self._column_count}
+            for index, column in columns.items():
+                self._store_column(index, column)
+
+            if sidecar is not None:
+                sidecar.store_columns(columns, self._column_count, sidecar_signature)
+
+        if is_reading and not same_rows:
+            parsed_bytes = complete_size(self.filepath)
+            identity = read_identity(self.filepath)
+            if identity != identity_before_read or (was_loaded and identity != self._parsed_identity):
+                # the columns may not all hold the same rows
+                parsed_bytes, identity = None, None
+            self._parsed_bytes = parsed_bytes
+            self._parsed_identity = identity
+
+        self._is_data_loaded = all(column is not None for column in self.columns)
+        return is_reading
+
+    def _load_columns(self, indexes) -> bool:
+        r"""
+        Loads the columns given by their `indexes` if needed, returns whether some had to be read
+        """
+        if not self.file_exists or self._is_data_loaded:
+            return False
 
+        with self._get_load_lock():
+            return self._load_data(indexes)
 
-        with open(self.filepath) as openFile:
-            reader = csv.reader(openFile, delimiter=self.csv_separator)
-            self._is_data_loaded = True
+    def _get_load_lock(self) -> threading.Lock:
+        if self._load_lock is None:
+            with self._load_lock_creation_lock:
+                if self._load_lock is None:
+                    self._load_lock = threading.Lock()
+        return self._load_lock
 
-            for row_number, row_content in enumerate(reader):
-                if row_number > self.skip_lines:
-                    extend_columns(len(row_content))
-                    for col, val in enumerate(row_content):
-                        self.columns[col].append(val)
-                    if len(row_content) < len(self.columns):
-                        for col in range(len(row_content), len(self.columns)):
-                            self.columns[col].append("")
+    def _is_pinned(self) -> bool:
+        r"""
+        Whether the loaded data can't be dropped: it isn't saved to disk
+        """
+        return not self.file_exists or self._has_unsaved_changes
 
-        # Delete any eventual empty column
-        if all([val == "" for val in self.columns[-1]]):
-            del self.columns[-1]
+    def _payload_nbytes(self) -> int:
+        r"""
+        Estimated memory used by the loaded data of the file
+        """
+        size = 0
+        for column in self.columns:
+            if column is not None:
+                size += column.nbytes
+                if column.dtype.kind == "O":
+                    size += len(column) * OBJECT_CELL_BYTES
+        for rows, texts in self._text_cells.values():
+            size += rows.nbytes + len(texts) * OBJECT_CELL_BYTES
+        if self._result_cache is not None:
+            size += self._result_cache.current_bytes
+        return size
+
+    def _touch(self, loaded=None):
+        if self._payload_cache is not None:
+            self._payload_cache.touch(self, loaded)
+
+    def preload(self, columns: typing.List[typing.Union[str, int]] = None):
+        r"""
+        Loads the given columns of the file into memory, by name or index, or all of them if `columns` is None.
+        Calling it is optional: `get()` loads the columns it needs, and only them, on demand.
+        """
+        if columns is None:
+            loaded = self._load_columns(None)
+        else:
+            loaded = self._load_columns([self.column_name_to_index[column] if column in self.column_name_to_index else int(column)
+                                         for column in columns])
+        self._touch(loaded)
 
     def get_num_var_names(self) -> typing.List[str]:
         r"""
@@ -259,66 +581,181 @@ class DataFile:
 
         return list(self.column_name_to_index.keys())
 
-    def _populate_vars(self):
+    def _populate_vars(self, scalar_tables: dict):
         self.vars = dict()
-        for name_col, val_col in self.results_possible_col_names + self.settings_possible_col_names:
-            self.vars.update(self._load_scalar_results(result_names_col=name_col, result_values_col=val_col))
+        for pair in self.results_possible_col_names + self.settings_possible_col_names:
+            self.vars.update(scalar_tables.get(pair, dict()))
+        self.vars = _interned(self.vars)
+
+        self._populate_num_vars()
+
+    def _populate_num_vars(self):
+        # computed when first used
+        self._num_vars = None
+
+
+    def get_scalar_results(self, result_names_col: str = None, result_values_col: str = None) -> dict:
+        r"""
+        Returns the scalar results of the file, as a dict of (name, value) strings, read from the columns
+        `result_names_col` and `result_values_col` or, when they are not given, from the usual results columns.
+        """
+        if result_names_col and result_values_col:
+            return self._load_scalar_results(result_names_col, result_values_col)
 
-        self.num_vars = dict()
-        for key, val in self.vars.items():
-            try:
-                num_val = float(val)
-                self.num_vars[key] = num_val
-            except:
-                pass
+        scalar_results = dict()
+        for name_col, val_col in self.results_possible_col_names:
+            scalar_results.update(self._load_scalar_results(result_names_col=name_col, result_values_col=val_col))
+        return scalar_results
 
+    def _metadata_scalar_results(self) -> dict:
+        r"""
+        Returns the scalar results read from the usual results columns along with the metadata, without reading the
+        file again: `vars` holds them, and the sim settings read from the file
+        """
+        return {key: val for key, val in self.vars.items() if key not in self.sim_settings}
 
     def _load_scalar_results(self, result_names_col, result_values_col):
         scalar_results = dict()
 
-        column_names = self.get_column_names()
-        if result_names_col not in column_names or result_values_col not in column_names:
+        if result_names_col not in self.column_name_to_index or result_values_col not in self.column_name_to_index:
             return scalar_results
 
         if not self._is_data_loaded:
-            with open(self.filepath) as openFile:
-                reader = csv.reader(openFile, delimiter=self.csv_separator)
-                name_index = column_names.index(result_names_col)
-                val_index = column_names.index(result_values_col)
-
-                for row_number, row_content in enumerate(reader):
-                    if row_number > 0:
-                        scalar_name = ""
-                        scalar_val = ""
-                        for col, val in enumerate(row_content):
-                            if col == name_index:
-                                scalar_name = val
-                            elif col == val_index:
-                                scalar_val = val
-                        if scalar_name and scalar_val:
-                            scalar_results[scalar_name] = scalar_val
+            with MetadataScanner(self.filepath, self.csv_separator, self.skip_lines) as scanner:
+                scanner.read_header()
+                index_pairs = [(self.column_name_to_index[result_names_col], self.column_name_to_index[result_values_col])]
+                scalar_results, = scanner.read_scalar_tables(index_pairs, self.full_metadata_scan)
 
         else:
             names_column = self.get(result_names_col, data_type="string")
             values_column = self.get(result_values_col, data_type="string")
 
             for name, value in zip(names_column, values_column):
-                scalar_results[name] = value
+                if name and value:
+                    scalar_results[name] = value
 
         return scalar_results
 
-    def set(self, column_name: str, values: typing.Union[typing.List[float], typing.List[int], typing.List[str], typing.List[complex]]):
+    def _store_column(self, index: int, column: np.ndarray):
+        r"""
+        Stores the typed `column` at `index`. Columns of strings that mostly contain numbers are stored as "mixed"
+        columns: float64 with NaN for the other cells, whose text is kept aside so it isn't lost.
+        """
+        self._text_cells.pop(index, None)
+        if column.dtype.kind == "O":
+            mixed = split_mixed_column(column)
+            if mixed is not None:
+                column, rows, texts = mixed
+                self._text_cells[index] = (rows, texts)
+
+        if index == len(self.columns):
+            self.columns.append(column)
+        else:
+            self.columns[index] = column
+
+    def _column_strings(self, index: int) -> np.ndarray:
+        r"""
+        Returns the column at `index` as strings, with the text of the non numerical cells of mixed columns
+        """
+        if index not in self._text_cells:
+            return cast_column(self.columns[index], "string")
+        strings = np.array(column_to_strings(self.columns[index]), dtype=object)
+        rows, texts = self._text_cells[index]
+        strings[rows] = texts
+        return strings
+
+    def _read_texts(self, indexes) -> dict:
+        r"""
+        Returns the text of the cells of the loaded columns at `indexes` as it is in the file, read again from it:
+        parsed numbers don't always give back the text they were read from, e.g. "007", "1.50" or "1.00000000e-01".
+        Columns changed since they were read are left out, all the columns are if the file got rewritten since.
+        """
+        indexes = [index for index in indexes if index not in self._changed_columns]
+        identity = self._parsed_identity
+        if not indexes or identity is None:
+            return dict()
+
+        filepath = identity[0]
+        try:
+            if self._parsed_bytes is not None and continues_identity(identity):
+                # the rows appended since are left out
+                offset = data_offset(filepath, self.skip_lines)
+                cells = read_appended_rows(filepath, offset, self.csv_separator, indexes, identity[3])[0] if offset is not None else dict()
+            elif read_identity(filepath) == identity:
+                cells = read_columns(filepath, self.csv_separator, self.skip_lines, indexes)[0]
+            else:
+                cells = dict()
+        except OSError:
+            return dict()
+
+        return {index: np.array(cells[index], dtype=object) for index in indexes
+                if index in cells and len(cells[index]) == len(self.columns[index])}
+
+    def _column_text(self, index: int) -> np.ndarray:
+        r"""
+        Returns the column at `index` as strings, as written in the file when it didn't change since it was read,
+        see `_read_texts()`. The text read from the file is kept in the cache of the results of `get()`.
+        """
+        column = self.columns[index]
+        if column.dtype.kind == "O" or index in self._changed_columns:
+            return self._column_strings(index)
+
+        names = [name for name, name_index in self.column_name_to_index.items() if name_index == index]
+        result_cache = self._get_result_cache()
+        key = (names[0] if names else index, "string")
+        text = result_cache.get(key)
+        if text is None:
+            text = self._read_texts([index]).get(index)
+            if text is None:
+                return self._column_strings(index)
+            text.flags.writeable = False
+            result_cache.put(key, text, text.nbytes + len(text) * OBJECT_CELL_BYTES, names)
+        return text
+
+    def _consolidate_columns(self):
+        r"""
+        Merges the values appended with `append_to_columns()` into the typed columns
+        """
+        for index, pending in self._pending_values.items():
+            column = self._column_strings(index) if index in self._text_cells else self.columns[index]
+            self._store_column(index, concat_columns(column, make_column(pending)))
+        self._pending_values.clear()
+
+    def get_column_types(self) -> dict:
+        r"""
+        Returns the type inferred for each column when it got loaded, as a dict that maps column names to
+        "integer", "float", "complex", "string" or "mixed". Mixed columns are columns that mostly contain numbers: they are
+        stored as float, the cells that are not numbers are NaN when asked as numbers and keep their text when asked as strings.
+        Loads all the columns of the file.
+        """
+        self._load_columns(None)
+        self._consolidate_columns()
+        return {name: "mixed" if index in self._text_cells else column_type(self.columns[index])
+                for name, index in self.column_name_to_index.items()}
+
+    def _column_size(self, index: int) -> int:
+        return len(self.columns[index]) + len(self._pending_values.get(index, []))
+
+    def set(self, column_name: str, values: typing.Union[typing.List[float], typing.List[int], typing.List[str], typing.List[complex], np.ndarray]):
 
         if self.file_exists and not self._is_data_loaded:
             self._load_data()
 
+        self._invalidate_results([column_name])
+        self._has_unsaved_changes = True
+
         if column_name in self.column_name_to_index:
-            self.columns[self.column_name_to_index[column_name]] = values.copy()
+            index = self.column_name_to_index[column_name]
+            self._pending_values.pop(index, None)
         else:
-            self.column_name_to_index[column_name] = len(self.columns)
-            self.columns.append(values.copy())
-
-    def get(self, expr: str, data_type: str = "float") -> typing.List[typing.Union[float, str, int, complex]]:
+            index = len(self.columns)
+            # the mapping may be shared with other files, see `_shared_column_names()`
+            self.column_name_to_index = {**self.column_name_to_index, sys.intern(column_name): index}
+        self._store_column(index, make_column(values))
+        self._changed_columns = self._changed_columns | {index}
+        self._touch()
+
+    def get(self, expr: str, data_type: str = "float") -> np.ndarray:
         r"""
         Returns the column whose name is given by `expr`, from the file given in `file_alias`.
         Note that `expr` can be a mathematical expression, like :math:` 2 * time + offset`
@@ -341,45 +778,271 @@ class DataFile:
         Returns
         -------
 
-        A list of `type` containing the result of `expr`
+        A numpy array of `type` containing the result of `expr`. When the column is already stored
+        with the requested type, a read-only view on it is returned instead of a copy. Results of
+        mathematical expressions are cached, and returned read-only too, until one of their inputs changes.
 
         """
+        if self._payload_cache is None:
+            return self._get(expr, data_type)
 
-        if self.file_exists and not self._is_data_loaded:
-            self._load_data()
-
-        if len(self.columns) == 0:
-            raise ValueError("Datafile empty, can't return any data")
+        # the data of the file can't be evicted, e.g. by other threads, while it's being read
+        self._payload_cache.acquire(self)
+        try:
+            return self._get(expr, data_type)
+        finally:
+            self._payload_cache.release(self)
 
-        data_caster_dict = {"string": identity, "float": get_float, "integer": get_integer, "complex": get_complex}
+    def _get(self, expr: str, data_type: str) -> np.ndarray:
+        self._consolidate_columns()
 
-        if data_type not in data_caster_dict.keys():
+        if data_type not in DATA_TYPES:
             raise ValueError("the given `data_type' doesn't match any known types. Which are `string', `integer', `float' or `complex'")
 
         if is_integer(expr):
             # the column's index is given
-            index = expr
-            return [data_caster_dict[data_type](val) for val in self.columns[index]]
+            index = int(expr)
+            self._touch(self._load_columns([index]))
+            self._check_not_empty()
+            return self._cast(index, data_type)
 
         elif expr in self.column_name_to_index:
             # a column name has been given
-            return [data_caster_dict[data_type](val) for val in self.columns[self.column_name_to_index[expr]]]
+            index = self.column_name_to_index[expr]
+            self._touch(self._load_columns([index]))
+            self._check_not_empty()
+            return self._cast(index, data_type)
 
         else:
             if data_type == "string":
                 raise ValueError(" `data_type' can't be `string' if a mathematical expression is asked ")
             # Assume that col general mathematical expression, involving column names as variables
-            parser = Parser()
-            expr = parser.parse(expr)
-            vals = []
-            var_values_dict = self.num_vars.copy()
+            result_cache = self._get_result_cache()
+            result = result_cache.get((expr, data_type))
+            if result is not None:
+                self._touch(False)
+                return result
+
+            expression = self._compile(expr)
+
+            # Only the columns the expression references are loaded, the first one gives the row count otherwise
+            loaded = self._load_columns([self.column_name_to_index[var_name] for var_name in expression.variables
+                                         if var_name in self.column_name_to_index] or [0])
+            self._check_not_empty()
+
+            result = self._evaluate(expression, data_type)
+            result.flags.writeable = False
+
+            dependencies = set(expression.variables)
+            if not any(var_name in self.column_name_to_index for var_name in dependencies):
+                # the number of rows of the result is given by the first column
+                dependencies.update(name for name, index in self.column_name_to_index.items() if index == 0)
+            result_cache.put((expr, data_type), result, result.nbytes, dependencies)
+            self._touch(loaded)
+
+            return result
+
+    @classmethod
+    async def aload(cls, filepath, **kwargs) -> "DataFile":
+        r"""
+        Async counterpart of the constructor: the file's metadata is read in the executor of the async API
+        (see `csv_manager.aio`) without blocking the event loop. Concurrent calls for the same file
+        and options share the same read. The keyword arguments are the ones of the constructor.
+        """
+        key = ("aload", str(filepath), repr(sorted(kwargs.items())))
+        return await run_shared(key, cls, filepath, **kwargs)
+
+    def refresh(self) -> int:
+        r"""
+        Reads the rows appended to the file since its columns were loaded, e.g. while a simulation is still writing it,
+        and appends them to the loaded columns. Only the new bytes of the file are parsed, a last line without its newline
+        is considered as still being written and is read by a later call. The cached results of `get()` are invalidated.
+
+        Columns that are not loaded are left as is, they get read whole when needed. Compressed files, and files that
+        got rewritten or that changed while being loaded, have their loaded columns read again entirely.
+
+        Returns
+        -------
+
+        The number of rows the loaded columns gained, negative if the file got shorter
+        """
+        if self._has_unsaved_changes:
+            raise ValueError("The file has changes that are not saved to disk, it can't be refreshed")
+        if not self.filepath.is_file():
+            return 0
+        self.file_exists = True
+
+        if self._payload_cache is not None:
+            self._payload_cache.acquire(self)
+        try:
+            with self._get_load_lock():
+                row_count = self._refresh()
+        finally:
+            if self._payload_cache is not None:
+                self._payload_cache.release(self)
+        self._touch()
+        return row_count
+
+    def _refresh(self) -> int:
+        self._consolidate_columns()
+        indexes = [index for index, column in enumerate(self.columns) if column is not None]
+        if not indexes:
+            return 0
+        previous_row_count = len(self.columns[indexes[0]])
+
+        if compression_of(self.filepath) is not None:
+            self._unload_columns()
+            self._load_data(indexes)
+            return len(self.columns[indexes[0]]) - previous_row_count
+
+        offset = self._parsed_bytes
+        if offset is None or not continues_identity(self._parsed_identity):
+            # the rows read so far can't be located in the file, or it got rewritten since: read them again
+            offset = data_offset(self.filepath, self.skip_lines)
+            if offset is None:
+                return 0
+            previous_columns = dict()
+        else:
+            previous_columns = {index: self._column_strings(index) if index in self._text_cells else self.columns[index]
+                                for index in indexes}
+
+        cells, self._parsed_bytes = read_appended_rows(self.filepath, offset, self.csv_separator, indexes)
+        self._parsed_identity = read_identity(self.filepath, self._parsed_bytes)
+        if previous_columns and not cells[indexes[0]]:
+            return 0
+
+        self.clear_cache()
+        for index in indexes:
+            column = parse_column(cells[index])
+            if index in previous_columns:
+                column = concat_columns(previous_columns[index], column)
+            self._store_column(index, column)
+        return len(self.columns[indexes[0]]) - previous_row_count
+
+    async def arefresh(self) -> int:
+        r"""
+        Async counterpart of `refresh()`
+        """
+        return await run_blocking(self.refresh)
+
+    async def apreload(self, columns: typing.List[typing.Union[str, int]] = None):
+        r"""
+        Async counterpart of `preload()`
+        """
+        await run_blocking(self.preload, columns)
+
+    async def aget(self, expr: str, data_type: str = "float") -> np.ndarray:
+        r"""
+        Async counterpart of `get()`: the columns are read and the expression evaluated in the executor of the async
+        API, without blocking the event loop. Concurrent calls with the same arguments share the same evaluation,
+        and concurrent calls that need the same columns share their loading.
+        """
+        return await run_shared(("aget", id(self), expr, data_type), self.get, expr, data_type)
+
+    def _cast(self, index: int, data_type: str) -> np.ndarray:
+        r"""
+        Returns the column at `index` as `data_type`, which is a zero-copy read-only view when it's the column's type
+        """
+        if data_type == "string":
+            return self._column_text(index)
+        return cast_column(self.columns[index], data_type)
+
+    def _check_not_empty(self):
+        if len(self.columns) == 0:
+            raise ValueError("Datafile empty, can't return any data")
+
+    def _evaluate(self, expression: CompiledExpression, data_type: str) -> np.ndarray:
+        r"""
+        Evaluates `expression` on whole columns at once: only the columns the expression references get cast
+        to `data_type`, the other variables are taken from `num_vars`. Shorter columns are padded with NaN.
+        """
+        referenced_columns = self._referenced_columns(expression)
+        typed_columns = {var_name: cast_column(self.columns[self.column_name_to_index[var_name]], data_type)
+                         for var_name in referenced_columns}
+
+        if typed_columns:
+            row_count = max(len(column) for column in typed_columns.values())
+        else:
+            row_count = len(self.columns[0])
+
+        return self._evaluate_on(expression, typed_columns, row_count)
+
+    def _referenced_columns(self, expression: CompiledExpression) -> typing.List[str]:
+        return [var_name for var_name in expression.variables if var_name in self.column_name_to_index]
+
+    def _evaluate_on(self, expression: CompiledExpression, typed_columns: dict, row_count: int) -> np.ndarray:
+        values = {var_name: self.num_vars[var_name] for var_name in expression.variables
+                  if var_name not in typed_columns and var_name in self.num_vars}
+
+        for var_name, column in typed_columns.items():
+            if len(column) < row_count:
+                column = np.concatenate((column, np.full(row_count - len(column), np.nan)))
+            values[var_name] = column
+
+        return expression.evaluate(values, row_count)
+
+    def iter_chunks(self, columns: typing.List[typing.Union[str, int]], chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                    data_type: str = "float") -> typing.Iterator[dict]:
+        r"""
+        Yields the given columns, by name or index, by chunks of `chunk_rows` rows: each chunk is a dict that maps
+        each requested column to a numpy array of `data_type`. When the data isn't already in memory, the file is
+        read lazily and only one chunk is held in memory at a time, so files larger than RAM can be processed.
+        """
+        if isinstance(columns, (str, int)):
+            columns = [columns]
+        if data_type not in DATA_TYPES:
+            raise ValueError("the given `data_type' doesn't match any known types. Which are `string', `integer', `float' or `complex'")
+
+        indexes = [self.column_name_to_index[column] if column in self.column_name_to_index else int(column) for column in columns]
 
-            for i in range(len(self.columns[0])):
-                for var_name in self.column_name_to_index.keys():
-                    var_values_dict[var_name] = data_caster_dict[data_type](self.columns[self.column_name_to_index[var_name]][i])
-                vals.append(expr.evaluate(var_values_dict))
+        if not self.file_exists or self._is_data_loaded:
+            self._consolidate_columns()
+            row_count = max([len(self.columns[index]) for index in indexes], default=0)
+            typed_columns = {index: self._cast(index, data_type) for index in set(indexes)}
+            for start in range(0, row_count, chunk_rows):
+                yield {column: typed_columns[index][start:start + chunk_rows] for column, index in zip(columns, indexes)}
+            return
 
-            return vals
+        for chunk in iter_column_chunks(self.filepath, self.csv_separator, self.skip_lines, sorted(set(indexes)), chunk_rows):
+            typed_chunk = {index: cast_column(parse_column(cells), data_type) for index, cells in chunk.items()}
+            yield {column: typed_chunk[index] for column, index in zip(columns, indexes)}
+
+    def iter_expr(self, expr: str, chunk_rows: int = DEFAULT_CHUNK_ROWS, data_type: str = "float") -> typing.Iterator[np.ndarray]:
+        r"""
+        Yields the result of `expr`, a column name or a mathematical expression as given to `get()`, by chunks
+        of `chunk_rows` rows, reading only the columns it references. See `iter_chunks()`.
+        """
+        if is_integer(expr) or expr in self.column_name_to_index:
+            for chunk in self.iter_chunks([expr], chunk_rows, data_type):
+                yield chunk[expr]
+            return
+
+        if data_type == "string":
+            raise ValueError(" `data_type' can't be `string' if a mathematical expression is asked ")
+
+        expression = self._compile(expr)
+
+        referenced_columns = self._referenced_columns(expression)
+        # without any column in the expression, the first column gives the row count
+        for chunk in self.iter_chunks(referenced_columns or [0], chunk_rows, data_type):
+            row_count = max(len(column) for column in chunk.values())
+            yield self._evaluate_on(expression, {name: chunk[name] for name in referenced_columns}, row_count)
+
+    def stream_stats(self, expr: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> StreamStats:
+        r"""
+        Returns the count, min, max, mean and std of `expr` computed chunk by chunk, with bounded memory. NaN values are ignored.
+        """
+        return stream_stats(self.iter_expr(expr, chunk_rows))
+
+    def stream_histogram(self, expr: str, bins=10, range=None, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        r"""
+        Returns the `(hist, bin_edges)` histogram of `expr`, as numpy.histogram, computed chunk by chunk with bounded memory.
+        When `range` isn't given, a first pass over the data computes it.
+        """
+        if range is None and np.ndim(bins) == 0:
+            stats = self.stream_stats(expr, chunk_rows)
+            range = (stats.min, stats.max) if stats.count else (0., 1.)
+        return stream_histogram(self.iter_expr(expr, chunk_rows), bins, range)
 
     def append_to_columns(self, new_vals: dict) -> None:
         r"""
@@ -396,10 +1059,7 @@ class DataFile:
 
         """
         # First: check that the user provided correct input
-        for col_name, new_val in new_vals.items():
-            if not (isinstance(col_name, str) and \
-                isinstance(new_val, (str, bool, int, float, complex, np.int, np.complex, np.float))):
-                raise ValueError("Provided `new_vals` doesn't have the correct types, aka a dict[str, number or str]")
+        self._check_new_values(new_vals)
 
         # Load data if not already done
         if self.file_exists and not self._is_data_loaded:
@@ -413,34 +1073,154 @@ class DataFile:
         # Third: get size of biggest column in-file from new_vals keys
         biggest_col_size = 0
         for col_name in new_vals.keys():
-            size = len(self.columns[self.column_name_to_index[col_name]])
+            size = self._column_size(self.column_name_to_index[col_name])
             if size > biggest_col_size:
                 biggest_col_size = size
 
-        # Fourth: append empty string to smaller columns if needed
-        for col_name in new_vals.keys():
-            diff = biggest_col_size - len(self.columns[self.column_name_to_index[col_name]])
+        self._invalidate_results(new_vals.keys())
+        self._has_unsaved_changes = True
+        self._touch()
+
+        # Fourth: append empty values to smaller columns if needed, then the new values.
+        # They are kept in per-column lists until the next read, so appending stays O(1)
+        for col_name, new_val in new_vals.items():
+            index = self.column_name_to_index[col_name]
+            self._changed_columns = self._changed_columns | {index}
+            pending = self._pending_values.setdefault(index, [])
+            diff = biggest_col_size - self._column_size(index)
             if diff > 0:
-                for i in range(diff):
-                    self.columns[self.column_name_to_index[col_name]].append("")
+                pending += [None] * diff
+            pending.append(new_val)
 
-        # Fifth: append the new values
+    @staticmethod
+    def _check_new_values(new_vals: dict):
         for col_name, new_val in new_vals.items():
-            self.columns[self.column_name_to_index[col_name]].append(str(new_val))
+            if not (isinstance(col_name, str) and \
+                isinstance(new_val, (str, bool, int, float, complex, np.number, np.bool_))):
+                raise ValueError("Provided `new_vals` doesn't have the correct types, aka a dict[str, number or str]")
 
-    def save_to_disk(self, column_name_order=None):
+    def _extend_columns(self, new_columns: dict, row_count: int):
+        r"""
+        Appends `row_count` rows to the data, given as a dict that maps column names to lists of `row_count` values
+        (None for missing values). All the columns are padded to the same size first, so the rows stay aligned.
+        The data has to be loaded.
+        """
+        for col_name in new_columns.keys():
+            if col_name not in self.column_name_to_index:
+                self.set(col_name, [])
+
+        self._invalidate_results(self.column_name_to_index.keys())
+
+        biggest_col_size = max([self._column_size(index) for index in self.column_name_to_index.values()], default=0)
+        for col_name, index in self.column_name_to_index.items():
+            pending = self._pending_values.setdefault(index, [])
+            pending += [None] * (biggest_col_size - self._column_size(index))
+            pending += new_columns.get(col_name, [None] * row_count)
+
+    def _unload_columns(self):
+        r"""
+        Drops the columns read from the file, they will be read again when needed
+        """
+        self._pending_values.clear()
+        self._text_cells.clear()
+        self._changed_columns = frozenset()
+        self.clear_cache()
+        self.columns = [None] * self._column_count if self._column_count is not None else []
+        self._is_data_loaded = False
+        self._parsed_bytes = None
+        self._parsed_identity = None
+
+    def _drop_columns(self):
+        r"""
+        Same as `_unload_columns()`, for the data of a file that may be tracked by a `PayloadCache`:
+        the cache stops counting it, and can't evict the file while its columns are being dropped
+        """
+        if self._payload_cache is None:
+            with self._get_load_lock():
+                self._unload_columns()
+            return
+
+        self._payload_cache.acquire(self)
+        try:
+            with self._get_load_lock():
+                self._unload_columns()
+            self._payload_cache.discard(self)
+        finally:
+            self._payload_cache.release(self)
+
+    def open_appender(self, flush_rows: int = 1000, flush_interval: float = None) -> AppendWriter:
+        r"""
+        Returns an `AppendWriter` that buffers rows and appends them to the file on disk by batches, without
+        rewriting it. To use instead of `append_to_columns()` and `save_to_disk()` to log rows during a long run:
+
+            with datafile.open_appender(flush_interval=10) as appender:
+                for step in range(steps):
+                    appender.append({"time": step, "energy": energy})
+
+        Parameters
+        ----------
+
+        flush_rows : int or None
+            Number of buffered rows that triggers a write, `None` means no limit
+
+        flush_interval : float or None
+            Maximum number of seconds between two writes, `None` means no limit
+        """
+        return AppendWriter(self, flush_rows, flush_interval)
+
+    def save_to_disk(self, column_name_order=None, float_format: str = None, atomic: bool = False):
         r"""
             Saves the file's data to disk.
             Warning: if the Datafile has been loaded from a file, it will overwrite it with any changes that has been made
             to the class instance.
+
+            Parameters
+            ----------
+
+            float_format : str or None
+                printf-style format of the float values, e.g. "%.6g". By default floats are written with
+                the shortest representation that reads back the same value.
+
+            atomic : bool
+                Write to a temporary file then rename it, so the file is never seen partially written
         """
+        self._load_columns(None)
+        self._consolidate_columns()
+
         remaining_column_names = [name for (name, index) in sorted(self.column_name_to_index.items(), key=lambda item: item[1])]
-        data_array = []
+        column_names = []
         if column_name_order:
             for column_name in column_name_order:
                 if column_name in remaining_column_names:
                     remaining_column_names.remove(column_name)
-                    data_array += [[column_name, *self.columns[self.column_name_to_index[column_name]]]]
-
-        data_array += [[key, *self.columns[self.column_name_to_index[key]]] for key in remaining_column_names]
-        write(data_array, self.filepath, list_type = 'columns', separator=' ')
\ No newline at end of file
+                    column_names.append(column_name)
+        column_names += remaining_column_names
+
+        # Numerical columns that didn't change are written with the text they were read from, unless `float_format`
+        # asks for float columns to be formatted. The other typed columns are formatted here, as CSV cells,
+        # mixed columns need their text cells
+        indexes = [self.column_name_to_index[column_name] for column_name in column_names]
+        texts = self._read_texts([index for index in indexes if self.columns[index].dtype.kind in "ic" or
+                                  (self.columns[index].dtype.kind == "f" and float_format is None)])
+        columns = [texts[index] if index in texts else self._column_strings(index) if index in self._text_cells
+                   else format_column(self.columns[index], float_format) for index in indexes]
+        write(columns, self.filepath, list_type='columns', separator=self.csv_separator, header=column_names,
+              float_format=float_format, atomic=atomic)
+
+        # The data in memory now matches the file on disk, with its columns in the saved order
+        order = [self.column_name_to_index[column_name] for column_name in column_names]
+        self.columns = [self.columns[index] for index in order]
+        self._text_cells = {new_index: self._text_cells[index] for new_index, index in enumerate(order) if index in self._text_cells}
+        self.column_name_to_index = {column_name: index for index, column_name in enumerate(column_names)}
+        self._column_count = len(self.columns)
+        self._is_data_loaded = True
+        self.file_exists = True
+        self._has_unsaved_changes = False
+        self._changed_columns = frozenset()
+        self._parsed_bytes = complete_size(self.filepath)
+        self._parsed_identity = read_identity(self.filepath)
+        if self._result_cache is not None:
+            # the text of the columns is now the one written
+            for column_name in column_names:
+                self._result_cache.discard((column_name, "string"))
+        self._touch()
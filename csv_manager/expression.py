@@ -0,0 +1,251 @@
+import numpy as np
+from py_expression_eval import Parser, TNUMBER, TOP1, TOP2, TVAR, TFUNCALL
+
+class _Arguments(list):
+    r"""
+    The arguments of a function call, built by the `,` operator
+    """
+    pass
+
+def _append_argument(a, b):
+    if isinstance(a, _Arguments):
+        return _Arguments(a + [b])
+    return _Arguments([a, b])
+
+def _log(a, base=None):
+    if base is None:
+        return np.log(a)
+    return np.log(a) / np.log(base)
+
+# Magnitude from which integer results don't fit in int64
+_INT64_LIMIT = 2.0 ** 63
+
+def _is_integral(a) -> bool:
+    r"""
+    Whether `a` holds integers: a python integer, an integer array or an object array, which holds the python
+    integers of results that don't fit in int64
+    """
+    if isinstance(a, (bool, np.bool_)):
+        return False
+    return isinstance(a, int) or np.asarray(a).dtype.kind in "iuO"
+
+def _as_float(a) -> np.ndarray:
+    return np.asarray(a, dtype=np.float64)
+
+def _as_objects(a) -> np.ndarray:
+    r"""
+    Returns `a` as an array of python numbers, which don't overflow
+    """
+    return np.array(np.asarray(a).tolist(), dtype=object)
+
+def _exact_integers(function):
+    r"""
+    Wraps the numpy `function` of two arguments so it doesn't overflow on integers, like python's operators:
+    when the magnitude of its result, estimated with floats, doesn't fit in int64, it gets computed on python integers
+    """
+    def exact(a, b):
+        if not (_is_integral(a) and _is_integral(b)):
+            return function(a, b)
+        if np.asarray(a).dtype.kind != "O" and np.asarray(b).dtype.kind != "O":
+            estimate = function(_as_float(a), _as_float(b))
+            if not np.any(np.abs(estimate) >= _INT64_LIMIT):
+                return function(a, b)
+        return function(_as_objects(a), _as_objects(b))
+    return exact
+
+def _to_float(function):
+    r"""
+    Wraps the numpy `function` so it is given floats instead of the python integers of object arrays, which it can't handle
+    """
+    def on_floats(*args):
+        return function(*[_as_float(arg) if np.asarray(arg).dtype.kind == "O" else arg for arg in args])
+    return on_floats
+
+def _power(a, b):
+    r"""
+    `np.power` with python's semantics for integers: negative integer exponents give floats instead of raising
+    """
+    if _is_integral(a) and _is_integral(b) and np.any(np.asarray(b) < 0):
+        return np.float_power(_as_float(a), _as_float(b))
+    return np.power(a, b)
+
+def _from_python_numbers(result: np.ndarray) -> np.ndarray:
+    r"""
+    Returns the object array `result` of python numbers as int64, float64 or complex128,
+    python integers that don't fit in int64 are kept as they are
+    """
+    values = result.tolist()
+    if all(isinstance(val, bool) for val in values):
+        return np.array(values, dtype=bool)
+    if all(isinstance(val, int) for val in values):
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            return result
+    if any(isinstance(val, complex) for val in values):
+        return np.array(values, dtype=np.complex128)
+    return np.array(values, dtype=np.float64)
+
+def _reduce(ufunc):
+    def reduced(*args):
+        result = args[0]
+        for arg in args[1:]:
+            result = ufunc(result, arg)
+        return result
+    return reduced
+
+_OPS1 = {
+    'sin': np.sin,
+    'cos': np.cos,
+    'tan': np.tan,
+    'asin': np.arcsin,
+    'acos': np.arccos,
+    'atan': np.arctan,
+
+    'sind': lambda a: np.sin(np.radians(a)),
+    'cosd': lambda a: np.cos(np.radians(a)),
+    'tand': lambda a: np.tan(np.radians(a)),
+    'asind': lambda a: np.degrees(np.arcsin(a)),
+    'acosd': lambda a: np.degrees(np.arccos(a)),
+    'atand': lambda a: np.degrees(np.arctan(a)),
+
+    'sqrt': np.sqrt,
+    'abs': np.abs,
+    'ceil': np.ceil,
+    'floor': np.floor,
+    'round': np.round,
+    '-': np.negative,
+    'not': np.logical_not,
+    'exp': np.exp,
+}
+# the python integers of results that don't fit in int64 are given as floats to the functions that can't handle them
+_OPS1 = {name: op if name in ('-', 'abs', 'not') else _to_float(op) for name, op in _OPS1.items()}
+
+_OPS2 = {
+    '+': _exact_integers(np.add),
+    '-': _exact_integers(np.subtract),
+    '*': _exact_integers(np.multiply),
+    '/': _to_float(np.true_divide),
+    '%': _exact_integers(np.mod),
+    '^': _exact_integers(_power),
+    '**': _exact_integers(_power),
+    ',': _append_argument,
+    "==": np.equal,
+    "!=": np.not_equal,
+    ">": np.greater,
+    "<": np.less,
+    ">=": np.greater_equal,
+    "<=": np.less_equal,
+    "and": np.logical_and,
+    "or": np.logical_or,
+    "xor": np.logical_xor,
+}
+
+_FUNCTIONS = {
+    'log': _to_float(_log),
+    'min': _reduce(_exact_integers(np.minimum)),
+    'max': _reduce(_exact_integers(np.maximum)),
+    'pyt': _to_float(np.hypot),
+    'pow': _exact_integers(_power),
+    'atan2': _to_float(np.arctan2),
+    'if': np.where,
+}
+
+class CompiledExpression:
+    r"""
+    A mathematical expression, parsed once with `py_expression_eval`, that gets evaluated on whole
+    numpy arrays at once instead of row by row.
+
+    Expressions that use operators or functions without a numpy counterpart (e.g. `random`, `fac`, `concat`)
+    are still supported, but get evaluated row by row with `py_expression_eval`.
+    """
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.parsed = Parser().parse(expr)
+        self.variables = self.parsed.variables()
+        self.vectorizable = self._is_vectorizable()
+
+    def _is_vectorizable(self):
+        for token in self.parsed.tokens:
+            if token.type_ == TOP1 and token.index_ not in _OPS1:
+                return False
+            elif token.type_ == TOP2 and token.index_ not in _OPS2:
+                return False
+            elif token.type_ == TVAR and token.index_ in self.parsed.functions and token.index_ not in _FUNCTIONS:
+                return False
+        return True
+
+    def evaluate(self, values: dict, row_count: int) -> np.ndarray:
+        r"""
+        Evaluates the expression and returns an array of size `row_count`. Integer operations don't overflow:
+        results that don't fit in int64 are returned as an object array of python integers.
+
+        Parameters
+        ----------
+
+        values : dict
+            Contains the value of every variable of the expression: either a numpy array of size `row_count`
+            or a scalar
+
+        row_count : int
+            The size of the returned array
+        """
+        missing_variables = [var for var in self.variables if var not in values]
+        if missing_variables:
+            raise ValueError("Undefined variables in expression `{0}': {1}".format(self.expr, ", ".join(missing_variables)))
+
+        if self.vectorizable:
+            with np.errstate(all="ignore"):
+                result = np.asarray(self._evaluate_vectorized(values))
+            if result.dtype.kind == "O":
+                # integers that overflowed int64 have been computed as python numbers
+                result = _from_python_numbers(result)
+        else:
+            result = np.asarray(self._evaluate_row_by_row(values, row_count))
+
+        if result.shape != (row_count,):
+            result = np.broadcast_to(result, (row_count,)).copy()
+        return result
+
+    def _evaluate_vectorized(self, values: dict):
+        stack = []
+        for token in self.parsed.tokens:
+            if token.type_ == TNUMBER:
+                stack.append(token.number_)
+            elif token.type_ == TVAR:
+                if token.index_ in values:
+                    stack.append(values[token.index_])
+                else:
+                    stack.append(_FUNCTIONS[token.index_])
+            elif token.type_ == TOP1:
+                stack.append(_OPS1[token.index_](stack.pop()))
+            elif token.type_ == TOP2:
+                b = stack.pop()
+                a = stack.pop()
+                stack.append(_OPS2[token.index_](a, b))
+            elif token.type_ == TFUNCALL:
+                args = stack.pop()
+                function = stack.pop()
+                if isinstance(args, _Arguments):
+                    stack.append(function(*args))
+                else:
+                    stack.append(function(args))
+            else:
+                raise ValueError("Invalid expression: `{0}'".format(self.expr))
+
+        if len(stack) != 1:
+            raise ValueError("Invalid expression (parity): `{0}'".format(self.expr))
+        return stack[0]
+
+    def _evaluate_row_by_row(self, values: dict, row_count: int):
+        arrays = {name: val for name, val in values.items() if isinstance(val, np.ndarray)}
+        row_values = {name: val for name, val in values.items() if name not in arrays}
+        arrays = {name: val.tolist() for name, val in arrays.items()}
+
+        results = []
+        for i in range(row_count):
+            for name, column in arrays.items():
+                row_values[name] = column[i]
+            results.append(self.parsed.evaluate(row_values))
+        return results
@@ -0,0 +1,142 @@
+from bisect import bisect_left
+
+class SettingsIndex:
+    r"""
+    Inverted index over the `sim_settings` and `base_name` of DataFile objects, used by `Database.filter_datafiles()`.
+
+    For each sim setting name, it maps every value to the set of files that have it, or to the file itself when it's the
+    only one, and keeps the values sorted so that prefix matches are a range in that list. Keyword matches are only tested
+    once per distinct `base_name`.
+    """
+
+    def __init__(self, datafiles=()):
+        self._files_by_setting = dict()
+        # the tuples of sim setting names, shared by the files that have the same settings
+        self._setting_names = dict()
+        self._sorted_values = dict()
+        self._files_by_base_name = dict()
+        self._indexed = dict()
+
+        for datafile in datafiles:
+            self.add(datafile)
+
+    def __contains__(self, datafile):
+        return datafile in self._indexed
+
+    def __len__(self):
+        return len(self._indexed)
+
+    def add(self, datafile):
+        if datafile in self._indexed:
+            self.remove(datafile)
+
+        names = tuple(datafile.sim_settings.keys())
+        names = self._setting_names.setdefault(names, names)
+        values = tuple(datafile.sim_settings.values())
+        self._indexed[datafile] = (datafile.base_name, names, values)
+
+        self._files_by_base_name.setdefault(datafile.base_name, set()).add(datafile)
+        for key, val in zip(names, values):
+            files_by_value = self._files_by_setting.setdefault(key, dict())
+            files = files_by_value.get(val)
+            if files is None:
+                files_by_value[val] = datafile
+                self._sorted_values.pop(key, None)
+            elif isinstance(files, set):
+                files.add(datafile)
+            elif files is not datafile:
+                files_by_value[val] = {files, datafile}
+
+    def remove(self, datafile):
+        base_name, names, values = self._indexed.pop(datafile)
+
+        files = self._files_by_base_name[base_name]
+        files.discard(datafile)
+        if not files:
+            del self._files_by_base_name[base_name]
+
+        for key, val in zip(names, values):
+            files_by_value = self._files_by_setting[key]
+            files = files_by_value[val]
+            if isinstance(files, set):
+                files.discard(datafile)
+                if len(files) == 1:
+                    files_by_value[val] = files.pop()
+            else:
+                del files_by_value[val]
+                self._sorted_values.pop(key, None)
+                if not files_by_value:
+                    del self._files_by_setting[key]
+
+    def clear(self):
+        self.__init__()
+
+    def copy(self) -> "SettingsIndex":
+        r"""
+        Returns an independent copy of the index, that can be changed while this one is being read
+        """
+        index = SettingsIndex()
+        index._files_by_setting = {key: {val: set(files) if isinstance(files, set) else files for val, files in files_by_value.items()}
+                                   for key, files_by_value in self._files_by_setting.items()}
+        index._setting_names = dict(self._setting_names)
+        # filled by readers, the sorted lists are replaced but never changed
+        index._sorted_values = dict(self._sorted_values)
+        index._files_by_base_name = {base_name: set(files) for base_name, files in self._files_by_base_name.items()}
+        index._indexed = dict(self._indexed)
+        return index
+
+    def _sorted_setting_values(self, key):
+        if key not in self._sorted_values:
+            self._sorted_values[key] = sorted(self._files_by_setting[key].keys())
+        return self._sorted_values[key]
+
+    def files_with_setting_prefix(self, key: str, prefix: str) -> set:
+        r"""
+        Returns the set of files that have the sim setting `key` and whose value starts with `prefix`
+        """
+        if key not in self._files_by_setting:
+            return set()
+
+        files_by_value = self._files_by_setting[key]
+        values = self._sorted_setting_values(key)
+
+        files = set()
+        for i in range(bisect_left(values, prefix), len(values)):
+            if not values[i].startswith(prefix):
+                break
+            value_files = files_by_value[values[i]]
+            if isinstance(value_files, set):
+                files.update(value_files)
+            else:
+                files.add(value_files)
+        return files
+
+    def files_with_keyword(self, keyword: str) -> set:
+        r"""
+        Returns the set of files whose `base_name` contains `keyword`
+        """
+        files = set()
+        for base_name, base_name_files in self._files_by_base_name.items():
+            if keyword in base_name:
+                files.update(base_name_files)
+        return files
+
+    def query(self, keywords=(), filter_dict=dict()) -> set:
+        r"""
+        Returns the set of indexed files whose `base_name` contains all the `keywords` and whose
+        sim settings values start with the values given in `filter_dict`
+        """
+        candidate_sets = [self.files_with_keyword(keyword) for keyword in keywords]
+        candidate_sets += [self.files_with_setting_prefix(key, prefix) for key, prefix in filter_dict.items()]
+
+        if not candidate_sets:
+            return set(self._indexed.keys())
+
+        # intersect starting from the smallest set
+        candidate_sets.sort(key=len)
+        files = set(candidate_sets[0])
+        for candidate_set in candidate_sets[1:]:
+            if not files:
+                break
+            files &= candidate_set
+        return files
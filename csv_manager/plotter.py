@@ -4,16 +4,23 @@ from .datafile import DataFile
 
 import matplotlib.pyplot as plt
 
-plt.rcParams['text.usetex'] = True
+# Matplotlib settings applied when the first Plotter gets created, rather than when this module gets imported:
+# changes made to them afterwards are kept by the next Plotter objects
+PLOT_RC_PARAMS = {
+    'text.usetex': True,
 
-plt.rcParams['figure.figsize'] = (11.69,8.27)
-plt.rcParams['axes.formatter.useoffset'] = True
-plt.rcParams['axes.formatter.limits'] = (-2, 2)
+    'figure.figsize': (11.69,8.27),
+    'axes.formatter.useoffset': True,
+    'axes.formatter.limits': (-2, 2),
 
-plt.rcParams['axes.grid'] = True
-plt.rcParams['font.size'] = 20
+    'axes.grid': True,
+    'font.size': 20,
+}
 
 class Plotter():
+    # whether PLOT_RC_PARAMS have been applied
+    _rc_params_applied = False
+
     def __init__(self, num_rows: int = 1, num_columns: int = 1, share_x: bool = False, share_y: bool = False, fig_num=None):
         r"""
         Creates a Plotter class instance, used to plot 2D data using matplotlib
@@ -44,6 +51,10 @@ class Plotter():
         self.fig = None
         self.plt = plt
 
+        if not Plotter._rc_params_applied:
+            plt.rcParams.update(PLOT_RC_PARAMS)
+            Plotter._rc_params_applied = True
+
         self._instance_new_subplots()
 
     def _instance_new_subplots(self):       
@@ -0,0 +1,419 @@
+import csv
+import io
+import mmap
+import os
+
+import numpy as np
+
+from .columns import parse_column, join_columns
+from .compressed import open_file, compression_of
+
+# Number of consecutive rows with empty scalar names after which `MetadataScanner` stops reading
+EMPTY_ROWS_BEFORE_STOP = 8
+# Number of bytes, before the end of what has been read from a file, that `read_identity()` keeps to recognize it later
+IDENTITY_TAIL_BYTES = 256
+
+class MetadataScanner:
+    r"""
+    Reads the header and the scalar tables (e.g. the `sim_setting_name` and `sim_setting_value` columns)
+    of a CSV file through a single open file handle, without parsing the whole file:
+    only the cells of the requested columns are looked at, and reading stops once the
+    scalar name columns stay empty. Compressed files only get decompressed up to that point.
+    """
+
+    def __init__(self, filepath, csv_separator=" ", skip_lines=0):
+        self.filepath = filepath
+        self.csv_separator = csv_separator
+        self.skip_lines = skip_lines
+        self._file = None
+        self._reader = None
+
+    def __enter__(self):
+        self._file = open_file(self.filepath, newline="")
+        self._reader = csv.reader(self._file, delimiter=self.csv_separator)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+
+    def read_header(self) -> list:
+        r"""
+        Returns the list of cells of the header row, an empty list if the file is empty
+        """
+        try:
+            for i in range(self.skip_lines):
+                next(self._reader)
+            return next(self._reader)
+        except StopIteration:
+            return []
+
+    def read_scalar_tables(self, index_pairs, full_scan=False) -> list:
+        r"""
+        Reads the rows that follow the header and returns, for each (name_index, value_index)
+        pair in `index_pairs`, a dict of the (name, value) cells found in these two columns.
+
+        Parameters
+        ----------
+
+        index_pairs : list[tuple[int, int]]
+            The column indexes of each (names, values) columns pair
+
+        full_scan : bool
+            Read the whole file instead of stopping after `EMPTY_ROWS_BEFORE_STOP` consecutive rows
+            where all the name columns are empty. Needed when the scalar tables don't start right after the header.
+        """
+        tables = [dict() for pair in index_pairs]
+        if not index_pairs:
+            return tables
+
+        empty_rows = 0
+        for row_content in self._reader:
+            row_size = len(row_content)
+            found_name = False
+            for table, (name_index, val_index) in zip(tables, index_pairs):
+                scalar_name = row_content[name_index] if name_index < row_size else ""
+                scalar_val = row_content[val_index] if val_index < row_size else ""
+                if scalar_name:
+                    found_name = True
+                    if scalar_val:
+                        table[scalar_name] = scalar_val
+
+            if found_name:
+                empty_rows = 0
+            else:
+                empty_rows += 1
+                if not full_scan and empty_rows >= EMPTY_ROWS_BEFORE_STOP:
+                    break
+
+        return tables
+
+def read_columns(filepath, csv_separator=" ", skip_lines=0, indexes=None):
+    r"""
+    Reads the data rows of a CSV file (the rows after the header) and returns the cells of the requested columns.
+
+    Parameters
+    ----------
+
+    indexes : list[int] or None
+        The indexes of the columns to return, `None` returns all of them. Rows that are too short
+        to have a cell in a column get an empty cell.
+
+    Returns
+    -------
+
+    A `(cells, column_count)` tuple: `cells` is a dict that maps each column index to its list of cells,
+    `column_count` is the number of columns in the file. A last column that only contains empty cells
+    (e.g. because of trailing separators) is not counted.
+    """
+    column_count = 0
+    last_column_has_values = False
+    cells = dict() if indexes is None else {index: [] for index in indexes}
+    row_count = 0
+
+    with open_file(filepath, newline="") as openFile:
+        reader = csv.reader(openFile, delimiter=csv_separator)
+
+        for row_number, row_content in enumerate(reader):
+            if row_number <= skip_lines:
+                continue
+
+            row_size = len(row_content)
+            if row_size > column_count:
+                column_count = row_size
+                last_column_has_values = row_content[-1] != ""
+            elif row_size == column_count and row_size:
+                last_column_has_values = last_column_has_values or row_content[-1] != ""
+
+            if indexes is None:
+                for col in range(len(cells), row_size):
+                    cells[col] = [""] * row_count
+                for col, val in enumerate(row_content):
+                    cells[col].append(val)
+                for col in range(row_size, len(cells)):
+                    cells[col].append("")
+            else:
+                for col, column_cells in cells.items():
+                    column_cells.append(row_content[col] if col < row_size else "")
+
+            row_count += 1
+
+    # Don't count any eventual empty column
+    if column_count and not last_column_has_values:
+        column_count -= 1
+        cells.pop(column_count, None)
+
+    return cells, column_count
+
+def complete_size(filepath):
+    r"""
+    Returns the size in bytes of an uncompressed file that ends with a complete line, None for compressed files,
+    files that don't exist and files whose last line is being written
+    """
+    if compression_of(filepath) is not None:
+        return None
+    try:
+        with open(filepath, "rb") as openFile:
+            size = openFile.seek(0, os.SEEK_END)
+            if size == 0:
+                return None
+            openFile.seek(-1, os.SEEK_END)
+            return size if openFile.read(1) == b"\n" else None
+    except OSError:
+        return None
+
+def read_identity(filepath, offset=None):
+    r"""
+    Returns what identifies the first `offset` bytes of a file, the whole file if `offset` is None: its path,
+    device and inode numbers, `offset`, its size, modification time and its last bytes before `offset`.
+    None if the file doesn't exist or is shorter than `offset`. See `continues_identity()`.
+    """
+    try:
+        with open(filepath, "rb") as openFile:
+            stat = os.fstat(openFile.fileno())
+            if offset is None:
+                offset = stat.st_size
+            if stat.st_size < offset:
+                return None
+            start = max(0, offset - IDENTITY_TAIL_BYTES)
+            openFile.seek(start)
+            tail = openFile.read(offset - start)
+    except OSError:
+        return None
+    return str(filepath), stat.st_dev, stat.st_ino, offset, stat.st_size, stat.st_mtime_ns, tail
+
+def continues_identity(identity) -> bool:
+    r"""
+    Whether the file `identity` was taken from, by `read_identity()`, still starts with the same bytes: it is the same file,
+    its bytes before the identity's offset didn't change and it has either been left as is or only got appended to.
+    """
+    if identity is None:
+        return False
+    filepath, device, inode, offset, size, mtime_ns, tail = identity
+    current = read_identity(filepath, offset)
+    if current is None or current[1:3] != (device, inode) or current[6] != tail:
+        return False
+    # a file rewritten with the same size still has a new modification time
+    return current[4] > size or current[5] == mtime_ns
+
+def data_offset(filepath, skip_lines=0):
+    r"""
+    Returns the byte offset of the first data row of an uncompressed file, the one after the header,
+    None if the header isn't complete yet
+    """
+    offset = 0
+    with open(filepath, "rb") as openFile:
+        for i in range(skip_lines + 1):
+            line = openFile.readline()
+            if not line.endswith(b"\n"):
+                return None
+            offset += len(line)
+    return offset
+
+def read_appended_rows(filepath, offset, csv_separator=" ", indexes=(), end_offset=None):
+    r"""
+    Reads the complete rows of an uncompressed file that start at the byte `offset`, and end before `end_offset`
+    if given. A last line without its newline is considered as still being written and left out.
+
+    Returns
+    -------
+
+    A `(cells, end_offset)` tuple: `cells` maps each index of `indexes` to its list of cells in the rows read,
+    and `end_offset` is the offset right after the last complete row, where the next read should start.
+    """
+    with open(filepath, "rb") as openFile:
+        openFile.seek(offset)
+        data = openFile.read(-1 if end_offset is None else max(0, end_offset - offset))
+
+    end = data.rfind(b"\n") + 1
+    cells = {index: [] for index in indexes}
+    if end:
+        reader = csv.reader(io.StringIO(data[:end].decode(), newline=""), delimiter=csv_separator)
+        for row_content in reader:
+            row_size = len(row_content)
+            for col, column_cells in cells.items():
+                column_cells.append(row_content[col] if col < row_size else "")
+    return cells, offset + end
+
+# Rows are parsed by blocks of about this many bytes by `read_columns_mmap`, to bound its temporary memory usage
+MMAP_BLOCK_BYTES = 32 * 1024 ** 2
+# Fields longer than this are parsed through Python strings instead of fixed width numpy byte strings
+MMAP_MAX_FIELD_WIDTH = 64
+
+def _find_bytes(buffer: np.ndarray, byte: int, offset: int = 0) -> np.ndarray:
+    r"""
+    Returns the positions of `byte` in `buffer`, offset by `offset`, scanning by blocks to bound memory usage
+    """
+    positions = [np.flatnonzero(buffer[start:start + MMAP_BLOCK_BYTES] == byte) + (start + offset)
+                 for start in range(0, len(buffer), MMAP_BLOCK_BYTES)]
+    return np.concatenate(positions) if positions else np.array([], dtype=np.int64)
+
+def _parse_fields(buffer: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    r"""
+    Parses the fields `buffer[starts[i]:starts[i] + lengths[i]]` into a typed column, with the same rules
+    as `parse_column`, without creating a Python string per field for numerical columns.
+    """
+    width = int(lengths.max()) if len(lengths) else 0
+    if width == 0:
+        return np.array([""] * len(lengths), dtype=object)
+
+    if width > MMAP_MAX_FIELD_WIDTH:
+        return parse_column([bytes(buffer[start:start + length]).decode() for start, length in zip(starts.tolist(), lengths.tolist())])
+
+    # Gather the fields into a (rows, width) matrix padded with null bytes, viewed as fixed width byte strings
+    offsets = np.arange(width)
+    inside = offsets < lengths[:, None]
+    matrix = np.where(inside, buffer[np.where(inside, starts[:, None] + offsets, 0)], 0).astype(np.uint8)
+    fields = np.ascontiguousarray(matrix).view("S{0}".format(width)).ravel()
+
+    empty = lengths == 0
+    if not empty.any():
+        try:
+            return fields.astype(np.int64)
+        except (ValueError, OverflowError):
+            pass
+
+    try:
+        column = np.full(len(fields), np.nan)
+        column[~empty] = fields[~empty].astype(np.float64)
+        return column
+    except ValueError:
+        pass
+
+    return parse_column([field.decode() for field in fields.tolist()])
+
+def read_columns_mmap(filepath, csv_separator=" ", skip_lines=0, indexes=None):
+    r"""
+    Same as `read_columns`, but memory-maps the file, finds row and field boundaries with numpy
+    and parses numerical columns straight into numpy arrays. Returns already typed columns instead of cells.
+
+    Returns None when the file can't be read this way (compressed or empty file, quoted fields, lone carriage returns):
+    `read_columns` has to be used instead.
+    """
+    if len(csv_separator) != 1 or compression_of(filepath) is not None:
+        return None
+
+    with open(filepath, "rb") as openFile:
+        try:
+            mapped_file = mmap.mmap(openFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            return None
+
+        try:
+            return _read_mapped_columns(mapped_file, ord(csv_separator), skip_lines, indexes)
+        finally:
+            mapped_file.close()
+
+def _read_mapped_columns(mapped_file, separator, skip_lines, indexes):
+    buffer = np.frombuffer(mapped_file, dtype=np.uint8)
+
+    if len(_find_bytes(buffer, ord('"'))):
+        # quoted fields need the csv module
+        return None
+
+    newlines = _find_bytes(buffer, ord("\n"))
+    row_starts = np.concatenate(([0], newlines + 1))
+    row_ends = np.concatenate((newlines, [len(buffer)]))
+    if row_starts[-1] == len(buffer):
+        # the file ends with a newline
+        row_starts, row_ends = row_starts[:-1], row_ends[:-1]
+
+    carriage_returns = (row_ends > row_starts) & (buffer[np.maximum(row_ends - 1, 0)] == ord("\r"))
+    if np.count_nonzero(carriage_returns) != len(_find_bytes(buffer, ord("\r"))):
+        return None
+    row_ends = row_ends - carriage_returns
+
+    # skip the header
+    row_starts, row_ends = row_starts[skip_lines + 1:], row_ends[skip_lines + 1:]
+
+    column_count = 0
+    last_column_has_values = False
+    parts = dict() if indexes is None else {index: [] for index in indexes}
+
+    block_start = 0
+    while block_start < len(row_starts):
+        block_end = max(block_start + 1, int(np.searchsorted(row_starts, row_starts[block_start] + MMAP_BLOCK_BYTES)))
+        starts, ends = row_starts[block_start:block_end], row_ends[block_start:block_end]
+        row_count = len(starts)
+
+        separators = _find_bytes(buffer[starts[0]:ends[-1]], separator, offset=starts[0])
+        separator_rows = np.searchsorted(starts, separators, side="right") - 1
+        separator_counts = np.bincount(separator_rows, minlength=row_count)
+        first_separators = np.cumsum(separator_counts) - separator_counts
+        field_counts = np.where(ends > starts, separator_counts + 1, 0)
+        # a sentinel at the end so the lookups below stay in bounds for rows that don't have the field
+        separators = np.append(separators, 0)
+
+        def field_bounds(index):
+            present = field_counts > index
+            if index == 0:
+                field_starts = starts
+            else:
+                field_starts = separators[np.minimum(first_separators + index - 1, len(separators) - 1)] + 1
+            field_ends = np.where(field_counts - 1 == index, ends, separators[np.minimum(first_separators + index, len(separators) - 1)])
+            return np.where(present, field_starts, 0), np.where(present, field_ends - field_starts, 0)
+
+        block_column_count = int(field_counts.max())
+        if block_column_count > column_count:
+            column_count = block_column_count
+            last_column_has_values = False
+        if block_column_count == column_count and column_count:
+            field_starts, lengths = field_bounds(column_count - 1)
+            last_column_has_values = last_column_has_values or bool(lengths.any())
+
+        wanted = range(block_column_count) if indexes is None else indexes
+        for index in wanted:
+            if index >= block_column_count:
+                continue
+            column_parts = parts.setdefault(index, [])
+            parsed_row_count = sum(len(part) for part in column_parts)
+            if parsed_row_count < block_start:
+                # the previous blocks didn't have this column
+                column_parts.append(np.array([""] * (block_start - parsed_row_count), dtype=object))
+            column_parts.append(_parse_fields(buffer, *field_bounds(index)))
+
+        block_start = block_end
+
+    # Don't count any eventual empty column
+    if column_count and not last_column_has_values:
+        column_count -= 1
+
+    total_row_count = len(row_starts)
+    columns = dict()
+    for index, column_parts in parts.items():
+        if index >= column_count:
+            continue
+        missing_row_count = total_row_count - sum(len(part) for part in column_parts)
+        if missing_row_count:
+            column_parts.append(np.array([""] * missing_row_count, dtype=object))
+        columns[index] = join_columns(column_parts)
+
+    return columns, column_count
+
+def iter_column_chunks(filepath, csv_separator=" ", skip_lines=0, indexes=(), chunk_rows=100000):
+    r"""
+    Reads the data rows of a CSV file lazily and yields the cells of the columns given by `indexes` by chunks
+    of `chunk_rows` rows, as dicts that map each column index to its list of cells. Only one chunk is held in memory.
+    """
+    with open_file(filepath, newline="") as openFile:
+        reader = csv.reader(openFile, delimiter=csv_separator)
+
+        for i in range(skip_lines + 1):
+            if next(reader, None) is None:
+                return
+
+        chunk = {index: [] for index in indexes}
+        chunk_size = 0
+        for row_content in reader:
+            row_size = len(row_content)
+            for index, column_cells in chunk.items():
+                column_cells.append(row_content[index] if index < row_size else "")
+            chunk_size += 1
+
+            if chunk_size == chunk_rows:
+                yield chunk
+                chunk = {index: [] for index in indexes}
+                chunk_size = 0
+
+        if chunk_size:
+            yield chunk
@@ -0,0 +1,154 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+SIDECAR_SUFFIX = ".npcache"
+SIDECAR_VERSION = 1
+
+class Sidecar:
+    r"""
+    A binary cache of a parsed CSV file, stored next to it in the `<filename>.npcache` directory:
+    one `.npy` file per parsed column, plus a `header.json` file that holds the column count, the file's
+    metadata (column names, sim settings and scalar variables) and the size and modification time of the CSV file
+    it has been created from. The cache is ignored as soon as the CSV file changes.
+
+    Columns are memory-mapped when loaded, so loading a column costs almost nothing until its values get used.
+    """
+
+    def __init__(self, csv_path, options: dict):
+        r"""
+        Parameters
+        ----------
+
+        csv_path : str or Path
+            The CSV file the sidecar caches
+
+        options : dict
+            The options the file is parsed with (e.g. separator, skipped lines), the sidecar
+            is ignored if it has been created with different options.
+        """
+        self.csv_path = Path(csv_path)
+        self.path = self.csv_path.with_name(self.csv_path.name + SIDECAR_SUFFIX)
+        self.options = options
+
+    def _signature(self):
+        stat = os.stat(self.csv_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def signature(self):
+        r"""
+        Returns the current signature of the CSV file, None if it can't be read. To be taken before parsing
+        the file and given to `store_metadata()` or `store_columns()`, so what's parsed from a file that changed
+        in the meantime doesn't get stored.
+        """
+        try:
+            return self._signature()
+        except OSError:
+            return None
+
+    def _header_to_update(self, signature) -> dict:
+        r"""
+        Returns the header to store data parsed from the CSV file with `signature` into, None if the file changed since
+        """
+        if signature is None or self.signature() != signature:
+            return None
+        header = self._read_header()
+        if header is None or header["signature"] != signature:
+            header = self._new_header(signature)
+        return header
+
+    def _read_header(self) -> dict:
+        r"""
+        Returns the header of the sidecar, or None if it doesn't exist or is out of date
+        """
+        try:
+            with open(self.path / "header.json") as header_file:
+                header = json.load(header_file)
+            signature = self._signature()
+        except (OSError, ValueError):
+            return None
+
+        if header.get("version") != SIDECAR_VERSION or header.get("signature") != signature or header.get("options") != self.options:
+            return None
+        return header
+
+    def _write_header(self, header: dict):
+        self._atomic_write(self.path / "header.json", lambda openFile: openFile.write(json.dumps(header).encode()))
+
+    def _new_header(self, signature) -> dict:
+        return {"version": SIDECAR_VERSION, "signature": signature, "options": self.options,
+                "metadata": None, "column_count": None, "columns": []}
+
+    def _atomic_write(self, filepath: Path, write_function):
+        temp_filepath = filepath.with_name(filepath.name + ".{0}.tmp".format(os.getpid()))
+        with open(temp_filepath, "wb") as openFile:
+            write_function(openFile)
+        os.replace(temp_filepath, filepath)
+
+    def read_metadata(self, metadata_options) -> dict:
+        r"""
+        Returns the metadata stored in the sidecar if it has been read with `metadata_options`, None otherwise
+        """
+        header = self._read_header()
+        if header is None or header["metadata"] is None or header.get("metadata_options") != metadata_options:
+            return None
+        return header["metadata"]
+
+    def store_metadata(self, metadata: dict, metadata_options, signature):
+        try:
+            header = self._header_to_update(signature)
+            if header is None:
+                return
+            header["metadata"] = metadata
+            header["metadata_options"] = metadata_options
+            os.makedirs(self.path, exist_ok=True)
+            self._write_header(header)
+        except OSError:
+            # the sidecar is only a cache, e.g. the folder may be read-only
+            pass
+
+    def column_count(self) -> int:
+        r"""
+        Returns the number of columns of the CSV file if known by the sidecar, None otherwise
+        """
+        header = self._read_header()
+        return None if header is None else header["column_count"]
+
+    def load_column(self, index: int):
+        r"""
+        Returns the column of the given index, memory-mapped, or None if it isn't in the sidecar
+        """
+        header = self._read_header()
+        if header is None or index not in header["columns"]:
+            return None
+        try:
+            column = np.load(self.path / "col_{0}.npy".format(index), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if column.dtype.kind == "U":
+            # string columns are stored as fixed width unicode, they are used as python strings in memory
+            return column.astype(object)
+        # a plain ndarray view, still backed by the memory-mapped file
+        return column.view(np.ndarray)
+
+    def store_columns(self, columns: dict, column_count: int, signature):
+        r"""
+        Stores the columns of the `columns` dict, that maps column indexes to typed columns, in the sidecar.
+        `signature` is the one of the CSV file before the columns got parsed, see `signature()`.
+        """
+        try:
+            header = self._header_to_update(signature)
+            if header is None:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            for index, column in columns.items():
+                if column.dtype.kind == "O":
+                    column = np.array(column.tolist(), dtype=str)
+                self._atomic_write(self.path / "col_{0}.npy".format(index), lambda openFile: np.save(openFile, column))
+            header["column_count"] = column_count
+            header["columns"] = sorted(set(header["columns"]) | set(columns.keys()))
+            self._write_header(header)
+        except OSError:
+            pass
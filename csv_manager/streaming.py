@@ -0,0 +1,118 @@
+import numpy as np
+
+DEFAULT_CHUNK_ROWS = 100000
+
+class StreamStats:
+    r"""
+    Summary statistics (count, min, max, mean, std) accumulated chunk by chunk, with bounded memory.
+    NaN values are ignored.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.mean = np.nan
+        self._m2 = 0.
+
+    def update(self, chunk):
+        chunk = np.asarray(chunk, dtype=np.float64)
+        chunk = chunk[~np.isnan(chunk)]
+        if len(chunk) == 0:
+            return
+
+        chunk_count = len(chunk)
+        chunk_mean = chunk.mean()
+        chunk_m2 = np.sum((chunk - chunk_mean) ** 2)
+
+        if self.count == 0:
+            self.min, self.max = chunk.min(), chunk.max()
+            self.mean, self._m2 = chunk_mean, chunk_m2
+        else:
+            # Chan et al. parallel update of the mean and the sum of squared deviations
+            total = self.count + chunk_count
+            delta = chunk_mean - self.mean
+            self.mean += delta * chunk_count / total
+            self._m2 += chunk_m2 + delta ** 2 * self.count * chunk_count / total
+            self.min, self.max = min(self.min, chunk.min()), max(self.max, chunk.max())
+        self.count += chunk_count
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def __repr__(self):
+        return "StreamStats(count={0}, min={1}, max={2}, mean={3}, std={4})".format(self.count, self.min, self.max, self.mean, self.std)
+
+class PointwiseStats:
+    r"""
+    Summary statistics (count, sum, min, max, mean, std) of curves sampled on the same points, accumulated
+    curve by curve, point by point, with memory bounded by the number of points. NaN values are ignored.
+    """
+
+    def __init__(self, point_count: int):
+        self.count = np.zeros(point_count, dtype=np.int64)
+        self.sum = np.zeros(point_count)
+        self.min = np.full(point_count, np.nan)
+        self.max = np.full(point_count, np.nan)
+        self._mean = np.zeros(point_count)
+        self._m2 = np.zeros(point_count)
+
+    def update(self, curve):
+        curve = np.asarray(curve, dtype=np.float64)
+        valid = ~np.isnan(curve)
+        values = np.where(valid, curve, 0.)
+
+        self.count += valid
+        self.sum += values
+        self.min = np.fmin(self.min, curve)
+        self.max = np.fmax(self.max, curve)
+
+        # Welford's update, at the points where the curve has a value
+        delta = np.where(valid, values - self._mean, 0.)
+        self._mean += delta / np.maximum(self.count, 1)
+        self._m2 += delta * np.where(valid, values - self._mean, 0.)
+
+    @property
+    def mean(self):
+        return np.where(self.count > 0, self._mean, np.nan)
+
+    @property
+    def variance(self):
+        return np.where(self.count > 0, self._m2 / np.maximum(self.count, 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+def stream_stats(chunks) -> StreamStats:
+    r"""
+    Returns the `StreamStats` of the values yielded, by chunks, by `chunks`
+    """
+    stats = StreamStats()
+    for chunk in chunks:
+        stats.update(chunk)
+    return stats
+
+def stream_histogram(chunks, bins=10, range=None):
+    r"""
+    Returns the `(hist, bin_edges)` histogram, as numpy.histogram, of the values yielded by `chunks`.
+    `range` has to be given (or `bins` has to be a sequence of bin edges) since the values are seen only once.
+    NaN values are ignored.
+    """
+    if np.ndim(bins) == 0:
+        if range is None:
+            raise ValueError("`range` is needed to compute a histogram over chunks with a number of bins")
+        bin_edges = np.histogram_bin_edges([], bins=bins, range=range)
+    else:
+        bin_edges = np.asarray(bins, dtype=np.float64)
+
+    hist = np.zeros(len(bin_edges) - 1, dtype=np.int64)
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.float64)
+        hist += np.histogram(chunk[~np.isnan(chunk)], bins=bin_edges)[0]
+    return hist, bin_edges
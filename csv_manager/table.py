@@ -0,0 +1,152 @@
+import numpy as np
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class SettingsTable:
+    r"""
+    Columnar table of the sim settings and scalar variables of a list of DataFile objects, used by `Database.query()`.
+
+    Each name found in the `vars` or `sim_settings` of the files is a column with one row per file: as float64,
+    with NaN where the file doesn't have it or where its value isn't a number, and as strings, with a mask of the
+    files that have it. Columns are built on first use.
+    """
+
+    def __init__(self, datafiles=()):
+        self.datafiles = list(datafiles)
+        self._numeric_columns = dict()
+        self._string_columns = dict()
+
+        # name -> (rows, values) of the files that have it, sim settings take precedence over variables
+        cells = dict()
+        for row, datafile in enumerate(self.datafiles):
+            values = dict(datafile.vars)
+            values.update(datafile.sim_settings)
+            for name, value in values.items():
+                rows, name_values = cells.setdefault(name, ([], []))
+                rows.append(row)
+                name_values.append(value)
+        self._cells = {name: (np.array(rows, dtype=np.int64), name_values) for name, (rows, name_values) in cells.items()}
+
+    def __len__(self):
+        return len(self.datafiles)
+
+    def __contains__(self, name):
+        return name in self._cells
+
+    def names(self) -> list:
+        return list(self._cells.keys())
+
+    def numeric(self, name: str) -> np.ndarray:
+        r"""
+        Returns the column `name` as float64, NaN where the value is missing or not a number
+        """
+        if name not in self._numeric_columns:
+            column = np.full(len(self.datafiles), np.nan)
+            if name in self._cells:
+                rows, values = self._cells[name]
+                column[rows] = [_to_float(value) for value in values]
+            column.flags.writeable = False
+            self._numeric_columns[name] = column
+        return self._numeric_columns[name]
+
+    def strings(self, name: str) -> tuple:
+        r"""
+        Returns the `(strings, present)` pair of the column `name`: its values as a numpy unicode array,
+        with empty strings where they are missing, and the boolean mask of the files that have a value
+        """
+        if name not in self._string_columns:
+            present = np.zeros(len(self.datafiles), dtype=bool)
+            if name in self._cells:
+                rows, values = self._cells[name]
+                strings = np.full(len(self.datafiles), "", dtype=object)
+                strings[rows] = [str(value) for value in values]
+                strings = strings.astype(str)
+                present[rows] = True
+            else:
+                strings = np.full(len(self.datafiles), "")
+            strings.flags.writeable = False
+            present.flags.writeable = False
+            self._string_columns[name] = (strings, present)
+        return self._string_columns[name]
+
+class Range:
+    r"""
+    Predicate of `Database.query()`: the numerical value is between `low` and `high`, included.
+    Either bound can be None for a one-sided range.
+    """
+
+    def __init__(self, low=None, high=None):
+        self.low = low
+        self.high = high
+
+    def mask(self, table: SettingsTable, name: str) -> np.ndarray:
+        column = table.numeric(name)
+        mask = ~np.isnan(column)
+        if self.low is not None:
+            mask &= column >= self.low
+        if self.high is not None:
+            mask &= column <= self.high
+        return mask
+
+class Equals:
+    r"""
+    Predicate of `Database.query()`: the value equals `value`, compared as a number when `value`
+    is a number (e.g. "25.0" equals 25) and as a string otherwise
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def mask(self, table: SettingsTable, name: str) -> np.ndarray:
+        if isinstance(self.value, str):
+            strings, present = table.strings(name)
+            return (strings == self.value) & present
+        return table.numeric(name) == self.value
+
+class Prefix:
+    r"""
+    Predicate of `Database.query()`: the value, as a string, starts with `prefix`
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    def mask(self, table: SettingsTable, name: str) -> np.ndarray:
+        strings, present = table.strings(name)
+        return np.char.startswith(strings, self.prefix) & present
+
+class OneOf:
+    r"""
+    Predicate of `Database.query()`: the value is one of `values`, numbers are compared as numbers
+    and strings as strings, see `Equals`
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def mask(self, table: SettingsTable, name: str) -> np.ndarray:
+        strings = [value for value in self.values if isinstance(value, str)]
+        numbers = [value for value in self.values if not isinstance(value, str)]
+
+        mask = np.zeros(len(table), dtype=bool)
+        if numbers:
+            mask |= np.isin(table.numeric(name), numbers)
+        if strings:
+            column, present = table.strings(name)
+            mask |= np.isin(column, strings) & present
+        return mask
+
+def as_predicate(condition):
+    r"""
+    Returns `condition` as a predicate: predicates are returned as is, lists, tuples and sets
+    become `OneOf` and other values `Equals`
+    """
+    if hasattr(condition, "mask"):
+        return condition
+    if isinstance(condition, (list, tuple, set, frozenset)):
+        return OneOf(condition)
+    return Equals(condition)
@@ -0,0 +1,249 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from .compressed import is_csv_filename
+
+# inotify(7) event flags
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+def _file_signature(filepath):
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def _scan_folder(folder_path) -> dict:
+    r"""
+    Returns the signatures, (size, mtime_ns), of the CSV files in `folder_path` and its subfolders
+    """
+    signatures = dict()
+    for filepath in Path(folder_path).rglob("*.csv*"):
+        if is_csv_filename(filepath.name):
+            signature = _file_signature(filepath)
+            if signature is not None:
+                signatures[str(filepath)] = signature
+    return signatures
+
+class _Inotify:
+    r"""
+    Minimal inotify binding, through ctypes, that watches a folder and its subfolders
+    """
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._folders = dict()
+
+    def watch_tree(self, folder_path) -> list:
+        r"""
+        Watches `folder_path` and its subfolders, returns the CSV files found in them
+        """
+        found_files = []
+        for folder, subfolders, filenames in os.walk(folder_path):
+            watch_descriptor = self._add_watch(self._fd, os.fsencode(folder), _WATCH_MASK)
+            if watch_descriptor >= 0:
+                self._folders[watch_descriptor] = folder
+            found_files += [os.path.join(folder, filename) for filename in filenames if is_csv_filename(filename)]
+        return found_files
+
+    def read(self, timeout: float):
+        r"""
+        Waits up to `timeout` seconds for events, returns the list of (path, mask) pairs that happened.
+        A None path means events were lost.
+        """
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            watch_descriptor, mask, cookie, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append((None, mask))
+            elif mask & IN_IGNORED:
+                self._folders.pop(watch_descriptor, None)
+            elif watch_descriptor in self._folders:
+                folder = self._folders[watch_descriptor]
+                events.append((os.path.join(folder, os.fsdecode(name)) if name else folder, mask))
+        return events
+
+    def close(self):
+        os.close(self._fd)
+
+def inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        _Inotify().close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+class FolderWatcher:
+    r"""
+    Watches the CSV files of a folder and its subfolders from a background thread, and reports the files that appear,
+    change or disappear. It uses inotify on Linux, and otherwise compares the size and modification time
+    of the files every `poll_interval` seconds.
+
+    Files that are being written are reported once they stop changing for `debounce` seconds.
+    """
+
+    def __init__(self, folder_path, callback, debounce: float = 1.0, poll_interval: float = 2.0, backend: str = "auto"):
+        r"""
+        Parameters
+        ----------
+
+        callback : callable
+            Called from the watcher's thread with the list of the `(filepath, signature)` pairs of the files that
+            changed: `signature` is the (size, mtime_ns) pair of the file, or None if it has been removed
+
+        debounce : float
+            Number of seconds a file has to stay unchanged before being reported
+
+        poll_interval : float
+            Number of seconds between two scans of the folder, when inotify isn't used
+
+        backend : str
+            "inotify", "polling" or "auto", which uses inotify when available
+        """
+        if backend not in ("auto", "inotify", "polling"):
+            raise ValueError("`backend` should be \"auto\", \"inotify\" or \"polling\"")
+        if backend == "auto":
+            backend = "inotify" if inotify_available() else "polling"
+
+        self.folder_path = str(folder_path)
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = backend
+
+        self._signatures = dict()
+        # filepath -> [last seen signature, time it was first seen]
+        self._pending = dict()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop_event.clear()
+        inotify = _Inotify() if self.backend == "inotify" else None
+        # The folder is watched before it is scanned, so no file gets missed in between
+        if inotify is not None:
+            inotify.watch_tree(self.folder_path)
+        self._signatures = _scan_folder(self.folder_path)
+        self._thread = threading.Thread(target=self._run, args=(inotify,), name="csv_manager watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self, inotify):
+        tick = min(self.debounce, self.poll_interval) / 2 or 0.05
+        last_scan_time = time.monotonic()
+        try:
+            while not self._stop_event.is_set():
+                if inotify is not None:
+                    for filepath, mask in inotify.read(tick):
+                        if filepath is None:
+                            self._rescan()
+                        elif mask & IN_ISDIR:
+                            if mask & (IN_CREATE | IN_MOVED_TO):
+                                self._mark_changed(inotify.watch_tree(filepath))
+                            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                                prefix = filepath + os.sep
+                                self._mark_changed([known for known in self._signatures if known.startswith(prefix)])
+                        elif is_csv_filename(os.path.basename(filepath)):
+                            self._mark_changed([filepath])
+                else:
+                    self._stop_event.wait(tick)
+                    if time.monotonic() - last_scan_time >= self.poll_interval:
+                        last_scan_time = time.monotonic()
+                        self._rescan()
+
+                self._report_settled_files()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _rescan(self):
+        signatures = _scan_folder(self.folder_path)
+        self._mark_changed([filepath for filepath, signature in signatures.items() if self._signatures.get(filepath) != signature])
+        self._mark_changed([filepath for filepath in self._signatures if filepath not in signatures])
+
+    def _mark_changed(self, filepaths):
+        now = time.monotonic()
+        for filepath in filepaths:
+            # files already pending get their timer reset by `_report_settled_files()` if they keep changing
+            if filepath not in self._pending:
+                self._pending[filepath] = [_file_signature(filepath), now]
+
+    def _report_settled_files(self):
+        now = time.monotonic()
+        changes = []
+        for filepath, entry in list(self._pending.items()):
+            signature = _file_signature(filepath)
+            if signature != entry[0]:
+                # still being written
+                entry[0], entry[1] = signature, now
+                continue
+            if signature is not None and now - entry[1] < self.debounce:
+                continue
+
+            del self._pending[filepath]
+            if signature != self._signatures.get(filepath):
+                if signature is None:
+                    del self._signatures[filepath]
+                else:
+                    self._signatures[filepath] = signature
+                changes.append((filepath, signature))
+
+        if changes:
+            try:
+                self.callback(changes)
+            except Exception:
+                # an error in the callback mustn't stop the watcher
+                traceback.print_exc()
@@ -1,11 +1,27 @@
 import os
+import time
 from pathlib import Path
 
-def write(data_list, file_path, list_type = 'rows', separator=' '):
+import numpy as np
+
+from .columns import make_column, format_column
+from .compressed import open_file, compression_of
+from .reader import read_identity
+
+# Size of the buffer of the files opened by `write()`, and number of rows formatted at once
+WRITE_BUFFER_BYTES = 8 * 1024 ** 2
+WRITE_BLOCK_ROWS = 65536
+
+def write(data_list, file_path, list_type = 'rows', separator=' ', header=None, float_format=None, atomic=False):
     r"""
     Writes `data_list` into the file `file_path` in a csv format with `separator`
     as separator. `data_list` can contain variable names to indicate the column names
-    in the resulting csv file.d
+    in the resulting csv file. The file gets compressed when its name ends with ".gz", ".xz" or ".zst".
+
+    Every value is written as `str(value)`, floats with `float_format` when it is given, whether the rows or
+    columns are lists or numpy arrays: e.g. 1.0 is written "1.0" and NaN "nan". Use `format_column()` on typed
+    columns beforehand to write them as `DataFile.save_to_disk()` does. Rows are formatted and written by blocks:
+    numerical numpy arrays are formatted a whole column at once, and each block of rows is joined into a single string.
 
     Parameters
     ----------
@@ -18,25 +34,185 @@ def write(data_list, file_path, list_type = 'rows', separator=' '):
         the script to write the file correctly.
     separator: str
         Separator to use to separate between columns, at the same row. 
+    header: list or None
+        Column names written as the first row of the file
+    float_format: str or None
+        printf-style format of the float values, e.g. "%.6g". By default floats are written with
+        the shortest representation that reads back the same value.
+    atomic: bool
+        Write to a temporary file in the same folder, then rename it to `file_path`: readers
+        never see a partially written file and the original file is kept if writing fails.
     """
-    file_folder = Path(file_path).parent
-    os.makedirs(file_folder, exist_ok=True)
-
-    data = open(file_path, 'w')
-    if list_type == 'rows':            
-        for row in data_list:
-            for value in row:
-                data.write(str(value) + separator)
-            data.write('\n')        
-    else:       
-        column_count = len(data_list)
-        row_count = max([len(col) for col in data_list])
-        for i in range(row_count):
-            for j in range(column_count):
-                if i < len(data_list[j]):
-                    data.write(str(data_list[j][i]) + separator)
+    file_path = Path(file_path)
+    os.makedirs(file_path.parent, exist_ok=True)
+
+    write_path = file_path.with_name(".{0}.{1}.tmp".format(file_path.name, os.getpid())) if atomic else file_path
+    try:
+        with open_file(write_path, 'w', buffering=WRITE_BUFFER_BYTES, compression=compression_of(file_path)) as data:
+            if header is not None:
+                data.write(separator.join(map(str, header)) + separator + '\n')
+            if list_type == 'rows':
+                if isinstance(data_list, np.ndarray) and data_list.ndim == 2:
+                    _write_columns(data, list(data_list.T), separator, float_format)
                 else:
-                    data.write(separator)
-            data.write('\n') 
-    data.close()
+                    _write_rows(data, data_list, separator, float_format)
+            else:
+                _write_columns(data, data_list, separator, float_format)
+        if atomic:
+            os.replace(write_path, file_path)
+    finally:
+        if atomic and write_path.exists():
+            os.remove(write_path)
+
+def _python_values(values):
+    r"""
+    Returns the values of `values` that `str()` formats the same, as python objects when possible since they're
+    formatted faster than numpy scalars
+    """
+    if isinstance(values, np.ndarray) and values.dtype in (np.float64, np.int64, np.bool_, np.complex128):
+        return values.tolist()
+    return values
+
+def _row_strings(row, float_format) -> list:
+    row = _python_values(row)
+    if float_format is None:
+        return list(map(str, row))
+    return [float_format % value if isinstance(value, (float, np.floating)) else str(value) for value in row]
+
+def _format_values(values, float_format) -> np.ndarray:
+    return np.array(_row_strings(values, float_format), dtype=object)
+
+def _write_rows(data, rows, separator, float_format):
+    row_end = separator + '\n'
+    for start in range(0, len(rows), WRITE_BLOCK_ROWS):
+        data.write("".join(separator.join(_row_strings(row, float_format)) + row_end
+                           for row in rows[start:start + WRITE_BLOCK_ROWS]))
+
+def _write_columns(data, columns, separator, float_format):
+    if not columns:
+        return
+    columns = [_format_values(column, float_format) for column in columns]
+    row_count = max(len(column) for column in columns)
+
+    for start in range(0, row_count, WRITE_BLOCK_ROWS):
+        stop = min(start + WRITE_BLOCK_ROWS, row_count)
+        # Cells interleaved with separators, joined into a single string: shorter columns get empty cells
+        cells = np.full((stop - start, 2 * len(columns)), "", dtype=object)
+        cells[:, 1::2] = separator
+        cells[:, -1] = separator + '\n'
+        for j, column in enumerate(columns):
+            block = column[start:stop]
+            cells[:len(block), 2 * j] = block
+        data.write("".join(cells.ravel().tolist()))
+
+class AppendWriter:
+    r"""
+    Appends rows to a `DataFile` by batches: rows are buffered, then written at the end of the file
+    on disk without rewriting what is already there, so logging rows during a long run stays linear in time.
+    Created by `DataFile.open_appender()`, can be used as a context manager that flushes the remaining rows on exit.
+
+    The buffered rows get written when `flush_rows` rows are buffered, when `flush_interval` seconds passed since
+    the last write (checked when a row is appended), when `flush()` gets called and when the writer gets closed.
+    The file gets entirely written, with `DataFile.save_to_disk()`, on the first write if it doesn't exist yet
+    and whenever the rows bring new columns.
+    """
+
+    def __init__(self, datafile, flush_rows=1000, flush_interval=None):
+        r"""
+        Parameters
+        ----------
+
+        datafile : DataFile
+            The file to append rows to. Its changes that are not saved to disk yet should be saved first,
+            as only the appended rows are written.
+
+        flush_rows : int or None
+            Number of buffered rows that triggers a write, `None` means no limit
+
+        flush_interval : float or None
+            Maximum number of seconds between two writes, `None` means no limit
+        """
+        self.datafile = datafile
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._buffer = dict()
+        self._row_count = 0
+        self._last_flush_time = time.monotonic()
+        self._on_disk = datafile.file_exists and datafile.filepath.is_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append(self, new_vals: dict):
+        r"""
+        Buffers a row, given as a dict of (column_name, value) pairs. The columns that are not given get an empty cell.
+        """
+        self.datafile._check_new_values(new_vals)
+
+        for col_name, new_val in new_vals.items():
+            values = self._buffer.setdefault(col_name, [])
+            values += [None] * (self._row_count - len(values))
+            values.append(new_val)
+        self._row_count += 1
+
+        if (self.flush_rows is not None and self._row_count >= self.flush_rows) or \
+           (self.flush_interval is not None and time.monotonic() - self._last_flush_time >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        r"""
+        Writes the buffered rows to disk and adds them to the data of the DataFile
+        """
+        self._last_flush_time = time.monotonic()
+        if not self._row_count:
+            return
+
+        for values in self._buffer.values():
+            values += [None] * (self._row_count - len(values))
+        new_columns, row_count = self._buffer, self._row_count
+        self._buffer = dict()
+        self._row_count = 0
+
+        datafile = self.datafile
+        if not self._on_disk or any(col_name not in datafile.column_name_to_index for col_name in new_columns):
+            datafile._load_columns(None)
+            datafile._extend_columns(new_columns, row_count)
+            datafile.save_to_disk()
+            self._on_disk = True
+            return
+
+        column_count = max(datafile.column_name_to_index.values()) + 1
+        columns = [[""] * row_count] * column_count
+        for col_name, values in new_columns.items():
+            columns[datafile.column_name_to_index[col_name]] = format_column(make_column(values))
+
+        separator = datafile.csv_separator
+        missing_newline = False
+        size_before_write = None
+        if compression_of(datafile.filepath) is None:
+            with open(datafile.filepath, "rb") as openFile:
+                size_before_write = openFile.seek(0, os.SEEK_END)
+                if size_before_write > 0:
+                    openFile.seek(-1, os.SEEK_END)
+                    missing_newline = openFile.read(1) != b"\n"
+        # compressed files get a new compressed stream appended
+        with open_file(datafile.filepath, "a") as openFile:
+            if missing_newline:
+                openFile.write("\n")
+            _write_columns(openFile, columns, separator, None)
+
+        if not datafile.file_exists or datafile._is_data_loaded:
+            datafile._extend_columns(new_columns, row_count)
+            # the appended rows are in memory, `DataFile.refresh()` mustn't read them again
+            in_sync = size_before_write is not None and not missing_newline and datafile._parsed_bytes == size_before_write
+            datafile._parsed_bytes = os.path.getsize(datafile.filepath) if in_sync else None
+            datafile._parsed_identity = read_identity(datafile.filepath, datafile._parsed_bytes) if in_sync else None
+        else:
+            # the columns will be read again, with the new rows, when needed
+            datafile._drop_columns()
 
+    def close(self):
+        self.flush()
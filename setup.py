@@ -16,7 +16,10 @@ setup(name='csv_manager',
       license='The Unlicense',
       packages=['csv_manager'],
       install_requires=[
-          'matplotlib', 'py_expression_eval'
+          'matplotlib', 'numpy', 'py_expression_eval'
       ],
+      extras_require={
+          'zstd': ['zstandard']
+      },
       include_package_data=True,
       zip_safe=False)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from csv_manager import DataFile
+from csv_manager.database import Database
+
+ROWS = {"a": [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)],
+        "b": [(4, 8), (0, 0), (2, 4), (1, 2), (3, 6)],
+        "c": [(0, 0), (2, 6), (4, 12)],
+        "d": [(0, 10), (1, 10), (2, 10)]}
+# the curves of the files on the grid [0, 1, 2, 3, 4]: NaN outside of the x range of a file
+CURVES = np.array([[0, 1, 2, 3, 4], [0, 2, 4, 6, 8], [0, 3, 6, 9, 12], [10, 10, 10, np.nan, np.nan]])
+
+@pytest.fixture
+def datafiles(tmp_path):
+    for name, rows in ROWS.items():
+        (tmp_path / "{}.csv".format(name)).write_text("t y \n" + "".join("{} {} \n".format(t, y) for t, y in rows))
+    return [DataFile(tmp_path / "{}.csv".format(name)) for name in ROWS]
+
+def test_aggregate_reducers(datafiles):
+    reducers = ["mean", "std", "var", "min", "max", "sum", "count", "median", 0.25]
+    grid, results = Database().aggregate(datafiles, "t", "y", reducer=reducers)
+    np.testing.assert_array_equal(grid, [0, 1, 2, 3, 4])
+
+    expected = {"mean": np.nanmean(CURVES, axis=0), "std": np.nanstd(CURVES, axis=0), "var": np.nanvar(CURVES, axis=0),
+                "min": np.nanmin(CURVES, axis=0), "max": np.nanmax(CURVES, axis=0), "sum": np.nansum(CURVES, axis=0),
+                "count": np.sum(~np.isnan(CURVES), axis=0), "median": np.nanmedian(CURVES, axis=0),
+                0.25: np.nanquantile(CURVES, 0.25, axis=0)}
+    assert list(results) == reducers
+    for name in reducers:
+        np.testing.assert_allclose(results[name], expected[name], err_msg=str(name))
+
+def test_aggregate_grids_and_workers(datafiles):
+    grid, mean = Database().aggregate(datafiles, "t", "y * 2", grid=3)
+    np.testing.assert_array_equal(grid, [0, 2, 4])
+    np.testing.assert_allclose(mean, 2 * np.nanmean(CURVES[:, ::2], axis=0))
+
+    grid, maximum = Database().aggregate(datafiles[2:], "t", "y", reducer="max", grid=np.array([1, 3, 5]))
+    np.testing.assert_allclose(maximum, [10, 9, np.nan])
+
+    for executor in ("thread", "process"):
+        grid, results = Database().aggregate(datafiles, "t", "y", reducer=["mean", "median"], workers=2, executor=executor)
+        np.testing.assert_allclose(results["mean"], np.nanmean(CURVES, axis=0))
+        np.testing.assert_allclose(results["median"], np.nanmedian(CURVES, axis=0))
+
+def test_aggregate_drops_the_columns_it_read(datafiles):
+    datafiles[0].get("t")
+    Database().aggregate(datafiles, "t", "y")
+    assert datafiles[0].columns[0] is not None
+    assert all(column is None for datafile in datafiles[1:] for column in datafile.columns)
+
+def test_aggregate_errors(datafiles):
+    with pytest.raises(ValueError):
+        Database().aggregate([], "t", "y")
+    with pytest.raises(ValueError):
+        Database().aggregate(datafiles, "t", "y", reducer="mode")
+    with pytest.raises(ValueError):
+        Database().aggregate(datafiles, "t", "y", reducer=1.5)
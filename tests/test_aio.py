@@ -0,0 +1,73 @@
+import asyncio
+import threading
+
+from csv_manager import database
+from csv_manager.database import Database
+
+def test_aload_from_folder_reads_the_files_on_the_shared_executor(tmp_path, monkeypatch, capsys):
+    for i in range(12):
+        (tmp_path / "run|T={}.csv".format(i)).write_text("x \n1 \n")
+
+    lock = threading.Lock()
+    running, max_running, thread_names = 0, 0, set()
+    load_datafile = database._load_datafile
+
+    def counted_load_datafile(filepath, datafile_options, metadata=None):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+            thread_names.add(threading.current_thread().name)
+        try:
+            return load_datafile(filepath, datafile_options, metadata)
+        finally:
+            with lock:
+                running -= 1
+
+    monkeypatch.setattr(database, "_load_datafile", counted_load_datafile)
+    db = Database()
+    asyncio.run(db.aload_from_folder(tmp_path, concurrency=2))
+
+    assert sorted(int(datafile.sim_settings["T"]) for datafile in db.datafiles) == list(range(12))
+    assert max_running <= 2
+    assert all(name.startswith("csv_manager") for name in thread_names)
+    assert capsys.readouterr().out == ""
+
+def test_aload_from_folder_reports_progress_from_the_event_loop(tmp_path):
+    for i in range(3):
+        (tmp_path / "run|T={}.csv".format(i)).write_text("x \n1 \n")
+
+    reports = []
+
+    async def load():
+        db = Database()
+        loop_thread = threading.current_thread()
+        await db.aload_from_folder(tmp_path, catalog=True, progress_interval=0,
+                                   progress_callback=lambda *counts: reports.append((counts, threading.current_thread() is loop_thread)))
+        return db
+
+    asyncio.run(load())
+    assert reports[0] == ((0, 3), True) and reports[-1] == ((3, 3), True)
+    assert all(on_loop for counts, on_loop in reports)
+
+    reports.clear()
+    assert len(asyncio.run(load()).datafiles) == 3
+    assert reports == [((0, 3), True), ((3, 3), True)]
+
+def test_aload_from_folder_keeps_the_files_added_meanwhile(tmp_path, monkeypatch):
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    (folder / "run|T=1.csv").write_text("x \n1 \n")
+    (tmp_path / "other|T=2.csv").write_text("x \n1 \n")
+
+    db = Database()
+    load_datafile = database._load_datafile
+
+    def load_datafile_and_add(filepath, datafile_options, metadata=None):
+        # e.g. a file found by `watch()` while the folder is being loaded
+        db.add(load_datafile(tmp_path / "other|T=2.csv", datafile_options))
+        return load_datafile(filepath, datafile_options, metadata)
+
+    monkeypatch.setattr(database, "_load_datafile", load_datafile_and_add)
+    asyncio.run(db.aload_from_folder(folder))
+    assert sorted(datafile.sim_settings["T"] for datafile in db.datafiles) == ["1", "2"]
@@ -0,0 +1,51 @@
+from csv_manager import DataFile
+
+def test_rows_are_appended_by_batches(tmp_path):
+    filepath = tmp_path / "log.csv"
+    datafile = DataFile(filepath)
+    with datafile.open_appender(flush_rows=2) as appender:
+        appender.append({"t": 0, "e": 1.5})
+        assert not filepath.exists()
+        appender.append({"t": 1, "e": float("nan")})
+        assert filepath.read_text() == "t e \n0 1.5 \n1  \n"
+        appender.append({"t": 2, "e": 2.0})
+        assert filepath.read_text() == "t e \n0 1.5 \n1  \n"
+    assert filepath.read_text() == "t e \n0 1.5 \n1  \n2 2 \n"
+    assert datafile.get("t").tolist() == [0, 1, 2]
+    assert DataFile(filepath).get("e", "string").tolist() == ["1.5", "", "2"]
+
+def test_new_columns_rewrite_the_file(tmp_path):
+    filepath = tmp_path / "log.csv"
+    filepath.write_text("t e \n0 1.5 \n")
+    datafile = DataFile(filepath)
+    with datafile.open_appender() as appender:
+        appender.append({"t": 1, "label": "x"})
+    assert filepath.read_text() == "t e label \n0 1.5  \n1  x \n"
+    assert DataFile(filepath).get("label", "string").tolist() == ["", "x"]
+
+def test_appended_rows_are_not_read_again_by_refresh(tmp_path):
+    filepath = tmp_path / "log.csv"
+    filepath.write_text("t \n0 \n1 \n")
+    datafile = DataFile(filepath)
+    assert datafile.get("t").tolist() == [0, 1]
+
+    with datafile.open_appender() as appender:
+        appender.append({"t": 2})
+    assert datafile.get("t").tolist() == [0, 1, 2]
+    datafile.refresh()
+    assert datafile.get("t").tolist() == [0, 1, 2]
+
+    # rows appended by another writer are read by `refresh()`
+    with open(filepath, "a") as openFile:
+        openFile.write("3 \n")
+    datafile.refresh()
+    assert datafile.get("t").tolist() == [0, 1, 2, 3]
+
+def test_rows_are_appended_after_a_missing_newline(tmp_path):
+    filepath = tmp_path / "log.csv"
+    filepath.write_text("t \n0 ")
+    datafile = DataFile(filepath)
+    with datafile.open_appender() as appender:
+        appender.append({"t": 1})
+    assert filepath.read_text() == "t \n0 \n1 \n"
+    assert DataFile(filepath).get("t").tolist() == [0, 1]
@@ -0,0 +1,56 @@
+from csv_manager import database
+from csv_manager.catalog import Catalog
+from csv_manager.database import Database
+
+def load(folder, monkeypatch, **kwargs):
+    r"""
+    Loads `folder` with a catalog, returns the database and the names of the files that had to be parsed
+    """
+    parsed = []
+    load_datafile = database._load_datafile
+
+    def recorded_load_datafile(filepath, datafile_options, metadata=None):
+        if metadata is None:
+            parsed.append(filepath.name)
+        return load_datafile(filepath, datafile_options, metadata)
+
+    monkeypatch.setattr(database, "_load_datafile", recorded_load_datafile)
+    db = Database()
+    db.load_from_folder(folder, progress_callback=None, catalog=True, **kwargs)
+    return db, sorted(parsed)
+
+def test_rescans_only_parse_new_and_changed_files(tmp_path, monkeypatch):
+    for i in range(3):
+        (tmp_path / "run|T={}.csv".format(i)).write_text("x setting_name setting_value \n1 N 1 \n")
+
+    db, parsed = load(tmp_path, monkeypatch)
+    assert len(parsed) == 3
+
+    db, parsed = load(tmp_path, monkeypatch)
+    assert parsed == []
+    assert [datafile.sim_settings for datafile in db.datafiles] == [{"N": "1"}] * 3
+
+    (tmp_path / "run|T=0.csv").write_text("x setting_name setting_value \n1 N 22 \n")
+    (tmp_path / "run|T=1.csv").unlink()
+    (tmp_path / "run|T=3.csv").write_text("x \n1 \n")
+    db, parsed = load(tmp_path, monkeypatch)
+    assert parsed == ["run|T=0.csv", "run|T=3.csv"]
+    assert [datafile.sim_settings for datafile in db.datafiles] == [{"N": "22"}, {"N": "1"}, {"T": "3"}]
+
+    with Catalog(tmp_path) as catalog:
+        assert sorted(catalog._entries) == ["run|T=0.csv", "run|T=2.csv", "run|T=3.csv"]
+
+def test_changed_options_parse_the_files_again(tmp_path, monkeypatch):
+    (tmp_path / "run|T=1.csv").write_text("x;setting_name;setting_value;\n1;N;1;\n")
+
+    db, parsed = load(tmp_path, monkeypatch)
+    assert parsed == ["run|T=1.csv"]
+    assert db.datafiles[0].sim_settings == {"T": "1"}
+
+    db, parsed = load(tmp_path, monkeypatch, csv_separator=";")
+    assert parsed == ["run|T=1.csv"]
+    assert db.datafiles[0].sim_settings == {"N": "1"}
+
+    db, parsed = load(tmp_path, monkeypatch, csv_separator=";")
+    assert parsed == []
+    assert db.datafiles[0].sim_settings == {"N": "1"}
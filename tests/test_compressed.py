@@ -0,0 +1,36 @@
+import pytest
+
+from csv_manager import DataFile
+from csv_manager.database import Database
+
+MAGIC_BYTES = {".gz": b"\x1f\x8b", ".xz": b"\xfd7zXZ\x00"}
+
+@pytest.mark.parametrize("extension", [".gz", ".xz"])
+def test_compressed_files_round_trip(tmp_path, extension):
+    filepath = tmp_path / ("run|T=1.csv" + extension)
+    datafile = DataFile(filepath)
+    datafile.set("x", [1, 2, 3])
+    datafile.set("y", [0.5, float("nan"), "a"])
+    datafile.save_to_disk()
+    assert filepath.read_bytes().startswith(MAGIC_BYTES[extension])
+
+    for reader in ("csv", "mmap"):
+        datafile = DataFile(filepath, reader=reader)
+        assert datafile.sim_settings == {"T": "1"} and datafile.base_name == "run"
+        assert datafile.get("x").tolist() == [1, 2, 3]
+        assert datafile.get("y", "string").tolist() == ["0.5", "", "a"]
+
+    with datafile.open_appender() as appender:
+        appender.append({"x": 4})
+    assert DataFile(filepath).get("x").tolist() == [1, 2, 3, 4]
+
+def test_compressed_files_are_loaded_from_folders(tmp_path):
+    for compression, extension in (("none", ""), ("gzip", ".gz"), ("xz", ".xz")):
+        datafile = DataFile(tmp_path / "run|C={}.csv{}".format(compression, extension))
+        datafile.set("x", [1])
+        datafile.save_to_disk()
+    (tmp_path / "notes.txt.gz").write_bytes(b"")
+
+    db = Database()
+    db.load_from_folder(tmp_path, progress_callback=None)
+    assert sorted(datafile.sim_settings["C"] for datafile in db.datafiles) == ["gzip", "none", "xz"]
@@ -0,0 +1,73 @@
+import pickle
+import sys
+import weakref
+
+from csv_manager import DataFile
+
+def test_datafiles_support_weakrefs_and_pickling(tmp_path):
+    filepath = tmp_path / "file|T=1.csv"
+    filepath.write_text("x setting_name setting_value \n1 T 1 \n")
+
+    datafile = DataFile(filepath)
+    assert weakref.ref(datafile)() is datafile
+    assert pickle.loads(pickle.dumps(datafile)).sim_settings == {"T": "1"}
+
+def test_datafile_attributes_can_be_set(tmp_path):
+    filepath = tmp_path / "file|T=1.csv"
+    filepath.write_text("x setting_name setting_value \n1 T 1 \n")
+    other_filepath = tmp_path / "other.csv"
+    other_filepath.write_text("x name value \n1 T 2 \n")
+
+    datafile = DataFile(filepath)
+    datafile.filename = "renamed.csv"
+    assert datafile.filepath == tmp_path / "renamed.csv"
+    datafile.label = "first run"
+    assert pickle.loads(pickle.dumps(datafile)).label == "first run"
+
+    other = DataFile(other_filepath)
+    other.settings_possible_col_names = (("name", "value"),)
+    other._read_metadata()
+    assert other.sim_settings == {"T": "2"}
+    assert DataFile(other_filepath).sim_settings == {}
+
+def test_unpickled_datafiles_share_their_strings(tmp_path):
+    filepath = tmp_path / "file|T=1.csv"
+    filepath.write_text("x setting_name setting_value \n1 Temperature 1 \n")
+
+    datafile = pickle.loads(pickle.dumps(DataFile(filepath)))
+    name = next(iter(datafile.sim_settings))
+    assert name is sys.intern("".join(["Temper", "ature"]))
+
+def test_files_with_the_same_columns_share_their_names(tmp_path):
+    for name in ("a.csv", "b.csv"):
+        (tmp_path / name).write_text("x y \n1 2 \n")
+
+    first, second = DataFile(tmp_path / "a.csv"), DataFile(tmp_path / "b.csv")
+    assert first.column_name_to_index is second.column_name_to_index
+
+    first.set("z", [3])
+    assert "z" in first.column_name_to_index
+    assert "z" not in second.column_name_to_index
+
+def test_settings_index_tracks_files_sharing_a_value(tmp_path):
+    from csv_manager.index import SettingsIndex
+
+    files = []
+    for name in ("run|T=10|N=1.csv", "run|T=10|N=2.csv", "run|T=12|N=3.csv"):
+        (tmp_path / name).write_text("x \n1 \n")
+        files.append(DataFile(tmp_path / name))
+
+    index = SettingsIndex(files)
+    assert index.files_with_setting_prefix("T", "1") == set(files)
+    assert index.files_with_setting_prefix("T", "10") == set(files[:2])
+
+    copy = index.copy()
+    index.remove(files[0])
+    assert index.files_with_setting_prefix("T", "10") == {files[1]}
+    assert index.files_with_setting_prefix("N", "1") == set()
+    index.remove(files[1])
+    assert index.files_with_setting_prefix("T", "1") == {files[2]}
+    index.add(files[0])
+    assert index.files_with_setting_prefix("T", "10") == {files[0]}
+
+    assert copy.files_with_setting_prefix("T", "10") == set(files[:2])
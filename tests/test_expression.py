@@ -0,0 +1,20 @@
+from csv_manager import DataFile
+
+def test_negative_integer_powers(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("t \n1 \n2 \n")
+
+    datafile = DataFile(filepath)
+    assert datafile.get("2^(0-1)+t").tolist() == [1.5, 2.5]
+    assert datafile.get("pow(2,-1)*t").tolist() == [0.5, 1.0]
+    assert datafile.get("t^2", "integer").tolist() == [1, 4]
+
+def test_integer_expressions_dont_overflow(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("t \n3 \n-2 \n")
+
+    datafile = DataFile(filepath)
+    assert datafile.get("t^50", "integer").tolist() == [3 ** 50, (-2) ** 50]
+    assert datafile.get("t+100000000000000000000", "integer").tolist() == [10 ** 20 + 3, 10 ** 20 - 2]
+    assert datafile.get("t*2", "integer").dtype == "int64"
+    assert datafile.get("t^50", "float").tolist() == [3. ** 50, 2. ** 50]
@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+IMPORT_TIME_BOUND = 1.0
+
+def test_import_is_light():
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            "import csv_manager\n"
+            "print(time.perf_counter() - start)\n"
+            "assert 'matplotlib' not in sys.modules\n")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout) < IMPORT_TIME_BOUND
+
+def test_star_import_exports_plotter():
+    namespace = dict()
+    exec("from csv_manager import *", namespace)
+    assert "Plotter" in namespace and "DataFile" in namespace and "Database" in namespace
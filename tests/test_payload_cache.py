@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from csv_manager.database import Database
+
+# bytes of the column of each file, as float64
+FILE_BYTES = 8000
+
+@pytest.fixture
+def folder(tmp_path):
+    for name in "abc":
+        (tmp_path / "{}.csv".format(name)).write_text("x \n" + "".join("{}.5 \n".format(i) for i in range(1000)))
+    return tmp_path
+
+def loaded(datafile) -> bool:
+    return datafile._payload_nbytes() > 0
+
+def test_least_recently_used_files_are_evicted(folder):
+    db = Database(payload_max_bytes=2 * FILE_BYTES)
+    db.load_from_folder(folder, progress_callback=None)
+    a, b, c = db.datafiles
+
+    a.get("x")
+    b.get("x")
+    a.get("x")
+    c.get("x")
+    assert [loaded(datafile) for datafile in (a, b, c)] == [True, False, True]
+    assert db.payload_cache.current_bytes == 2 * FILE_BYTES
+    assert (db.payload_cache.hits, db.payload_cache.misses, db.payload_cache.evictions) == (1, 3, 1)
+
+    # evicted files are read again when needed
+    np.testing.assert_array_equal(b.get("x"), np.arange(1000) + 0.5)
+    assert [loaded(datafile) for datafile in (a, b, c)] == [False, True, True]
+
+    db.set_payload_max_bytes(FILE_BYTES)
+    assert [loaded(datafile) for datafile in (a, b, c)] == [False, True, False]
+    db.payload_cache.clear()
+    assert not any(loaded(datafile) for datafile in db.datafiles) and db.payload_cache.current_bytes == 0
+
+def test_files_with_unsaved_changes_are_pinned(folder):
+    db = Database(payload_max_bytes=FILE_BYTES)
+    db.load_from_folder(folder, progress_callback=None)
+    a, b, c = db.datafiles
+
+    a.set("y", np.zeros(1000))
+    b.get("x")
+    c.get("x")
+    assert loaded(a) and not loaded(b) and loaded(c)
+    db.payload_cache.clear()
+    assert loaded(a) and a.get("y").tolist() == [0] * 1000
+
+    a.save_to_disk()
+    db.payload_cache.clear()
+    assert not loaded(a)
+    assert a.get("y").tolist() == [0] * 1000
+
+def test_files_in_use_are_not_evicted(folder):
+    db = Database(payload_max_bytes=FILE_BYTES)
+    db.load_from_folder(folder, progress_callback=None)
+    a, b, c = db.datafiles
+
+    a.get("x")
+    db.payload_cache.acquire(a)
+    # over the budget, `b` is the only file that can be dropped once read
+    np.testing.assert_array_equal(b.get("x"), np.arange(1000) + 0.5)
+    assert loaded(a) and not loaded(b)
+    db.payload_cache.release(a)
+    assert loaded(a)
+
+    c.get("x")
+    assert not loaded(a) and loaded(c)
@@ -0,0 +1,16 @@
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from csv_manager import plotter
+
+def test_rc_params_are_applied_by_the_first_plotter_only(monkeypatch):
+    monkeypatch.setattr(plotter.Plotter, "_rc_params_applied", False)
+    monkeypatch.setattr(plotter, "PLOT_RC_PARAMS", {"font.size": 20, "axes.grid": True})
+    with matplotlib.rc_context():
+        plotter.Plotter()
+        assert plt.rcParams["font.size"] == 20
+        plt.rcParams["font.size"] = 12
+        plotter.Plotter()
+        assert plt.rcParams["font.size"] == 12
+    plt.close("all")
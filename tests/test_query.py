@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from csv_manager import DataFile
+from csv_manager.database import Database
+from csv_manager.table import Range, Prefix, OneOf
+
+FILENAMES = ["run|wind=2|temp=25|solver=implicit_a.csv", "run|wind=4.5|temp=25.0|solver=implicit_b.csv",
+             "run|wind=7|temp=30|solver=explicit.csv", "run|wind=x|temp=25.csv"]
+
+@pytest.fixture
+def db(tmp_path):
+    for filename in FILENAMES:
+        (tmp_path / filename).write_text("x \n1 \n")
+    db = Database()
+    db.load_from_folder(tmp_path, progress_callback=None)
+    return db
+
+def winds(datafiles):
+    return [datafile.sim_settings["wind"] for datafile in datafiles]
+
+def test_query_predicates(db):
+    assert winds(db.query(wind=Range(2, 5))) == ["2", "4.5"]
+    assert winds(db.query(wind=Range(low=5))) == ["7"]
+    assert winds(db.query(temp=25)) == ["2", "4.5", "x"]
+    assert winds(db.query(temp="25")) == ["2", "x"]
+    assert winds(db.query(solver=Prefix("implicit"))) == ["2", "4.5"]
+    assert winds(db.query(wind=OneOf([2, "x"]))) == ["2", "x"]
+    assert winds(db.query(wind=[7, 4.5])) == ["4.5", "7"]
+    assert winds(db.query({"solver": Prefix("")})) == ["2", "4.5", "7"]
+    assert winds(db.query({"temp": 25}, solver=Prefix("implicit"), wind=Range(high=3))) == ["2"]
+    assert db.query(missing=1) == []
+    assert winds(db.query()) == ["2", "4.5", "7", "x"]
+
+def test_query_returns_indexes_and_follows_the_files(db, tmp_path):
+    indexes = db.query(temp=25, return_indexes=True)
+    assert isinstance(indexes, np.ndarray)
+    assert winds(db.datafiles[index] for index in indexes) == ["2", "4.5", "x"]
+
+    (tmp_path / "other|wind=3|temp=25.csv").write_text("x \n1 \n")
+    db.add(DataFile(tmp_path / "other|wind=3|temp=25.csv"))
+    assert sorted(winds(db.query(temp=25, wind=Range(2, 5)))) == ["2", "3", "4.5"]
+
+def test_settings_column(db):
+    np.testing.assert_array_equal(db.settings_column("wind"), [2, 4.5, 7, np.nan])
+    assert db.settings_column("solver", "string").tolist() == ["implicit_a", "implicit_b", "explicit", ""]
+    with pytest.raises(ValueError):
+        db.settings_column("wind", "integer")
@@ -0,0 +1,51 @@
+from csv_manager import DataFile
+
+def test_refresh_reads_the_appended_rows(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("t v \n1 10 \n2 20 \n")
+
+    datafile = DataFile(filepath)
+    assert datafile.get("t").tolist() == [1, 2]
+    with open(filepath, "a") as openFile:
+        openFile.write("3 30 \n")
+    assert datafile.refresh() == 1
+    assert datafile.get("t").tolist() == [1, 2, 3]
+    assert datafile.get("v").tolist() == [10, 20, 30]
+    assert datafile.refresh() == 0
+
+def test_refresh_waits_for_the_last_line_to_be_complete(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("t v \n1 10 \n")
+
+    datafile = DataFile(filepath)
+    datafile.preload()
+    with open(filepath, "a") as openFile:
+        openFile.write("2 20 \n3 3")
+    assert datafile.refresh() == 1
+    assert datafile.get("v").tolist() == [10, 20]
+
+    with open(filepath, "a") as openFile:
+        openFile.write("0 \n")
+    assert datafile.refresh() == 1
+    assert datafile.get("v").tolist() == [10, 20, 30]
+
+def test_refresh_reads_rewritten_files_again(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("t v \n1 10 \n2 20 \n")
+
+    datafile = DataFile(filepath)
+    assert datafile.get("t").tolist() == [1, 2]
+    filepath.write_text("t v \n100 1 \n200 2 \n300 3 \n")
+    assert datafile.refresh() == 1
+    assert datafile.get("t").tolist() == [100, 200, 300]
+    assert datafile.get("v").tolist() == [1, 2, 3]
+
+def test_columns_loaded_after_a_rewrite_hold_the_same_rows(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("t v \n1 10 \n2 20 \n")
+
+    datafile = DataFile(filepath)
+    assert datafile.get("t").tolist() == [1, 2]
+    filepath.write_text("t v \n100 1 \n200 2 \n300 3 \n")
+    assert datafile.get("v").tolist() == [1, 2, 3]
+    assert datafile.get("t").tolist() == [100, 200, 300]
@@ -0,0 +1,63 @@
+from csv_manager import DataFile
+
+SOURCE = ("id x result_name result_value big f \n"
+          "007 1 seed 0010 100000000000000000000 1.0 \n"
+          "010 2 tol 1.50 12345678901234567890123 1e-05 \n")
+
+def test_cells_are_saved_back_exactly(tmp_path):
+    for reader in ("csv", "mmap"):
+        filepath = tmp_path / "file_{}.csv".format(reader)
+        filepath.write_text(SOURCE)
+
+        datafile = DataFile(filepath, reader=reader)
+        assert datafile.get("id", "string").tolist() == ["007", "010"]
+        assert datafile.get("id", "integer").tolist() == [7, 10]
+        assert datafile.get("big", "string").tolist() == ["100000000000000000000", "12345678901234567890123"]
+
+        datafile.set("x", [3, 4])
+        datafile.save_to_disk()
+        assert filepath.read_text() == SOURCE.replace("007 1", "007 3").replace("010 2", "010 4")
+
+def test_scalar_results_dont_depend_on_loading(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text(SOURCE)
+
+    datafile = DataFile(filepath)
+    before_loading = datafile.get_scalar_results()
+    datafile.preload()
+    assert before_loading == datafile.get_scalar_results() == {"seed": "0010", "tol": "1.50"}
+
+def test_mixed_columns_keep_their_text(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("a \n1 \nx \n1.50 \n")
+
+    datafile = DataFile(filepath)
+    assert datafile.get_column_types() == {"a": "mixed"}
+    assert datafile.get("a", "string").tolist() == ["1", "x", "1.50"]
+    datafile.save_to_disk()
+    assert filepath.read_text() == "a \n1 \nx \n1.50 \n"
+
+def test_numerical_columns_dont_keep_their_text_in_memory(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("x y \n1.00000000e-01 0.500000 \n2.50000000e+00 1.000000 \n")
+
+    datafile = DataFile(filepath)
+    datafile.preload()
+    assert datafile._text_cells == {}
+    assert datafile.get_column_types() == {"x": "float", "y": "float"}
+    # the text is read again from the file when asked for
+    assert datafile.get("x", "string").tolist() == ["1.00000000e-01", "2.50000000e+00"]
+
+    datafile.set("y", [0.25, 1.0])
+    assert datafile.get("y", "string").tolist() == ["0.25", "1"]
+    datafile.save_to_disk()
+    assert filepath.read_text() == "x y \n1.00000000e-01 0.25 \n2.50000000e+00 1 \n"
+
+def test_rewritten_files_give_the_text_of_the_loaded_numbers(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("id \n007 \n010 \n")
+
+    datafile = DataFile(filepath)
+    datafile.preload()
+    filepath.write_text("id \n008 \n011 \n")
+    assert datafile.get("id", "string").tolist() == ["7", "10"]
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+
+from csv_manager import DataFile
+from csv_manager.sidecar import Sidecar
+
+OPTIONS = {"csv_separator": " ", "skip_lines": 0}
+
+def test_sidecar_is_ignored_once_the_csv_file_changes(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("x y \n1 2 \n3 4 \n")
+    assert DataFile(filepath, sidecar=True).get("x").tolist() == [1, 3]
+    assert Sidecar(filepath, OPTIONS).load_column(0).tolist() == [1, 3]
+
+    filepath.write_text("x y \n5 6 \n7 8 \n9 10 \n")
+    assert Sidecar(filepath, OPTIONS).load_column(0) is None
+    assert Sidecar(filepath, OPTIONS).read_metadata(False) is None
+    assert DataFile(filepath, sidecar=True).get("x").tolist() == [5, 7, 9]
+    assert Sidecar(filepath, OPTIONS).load_column(0).tolist() == [5, 7, 9]
+
+    # same size, newer modification time
+    filepath.write_text("x y \n1 6 \n7 8 \n9 10 \n")
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert DataFile(filepath, sidecar=True).get("x").tolist() == [1, 7, 9]
+
+def test_sidecar_is_ignored_with_other_options(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("x y \n1 2 \n")
+    DataFile(filepath, sidecar=True).get("x")
+
+    assert Sidecar(filepath, {"csv_separator": ";", "skip_lines": 0}).load_column(0) is None
+    assert Sidecar(filepath, {"csv_separator": " ", "skip_lines": 1}).column_count() is None
+    assert Sidecar(filepath, OPTIONS).read_metadata(True) is None
+    assert Sidecar(filepath, OPTIONS).read_metadata(False) is not None
+
+def test_columns_parsed_from_a_file_that_changed_are_not_stored(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("x \n1 \n")
+    sidecar = Sidecar(filepath, OPTIONS)
+    signature = sidecar.signature()
+
+    filepath.write_text("x \n1 \n2 \n")
+    sidecar.store_columns({0: np.array([1])}, 1, signature)
+    assert sidecar.load_column(0) is None
+
+def test_corrupted_sidecar_is_ignored(tmp_path):
+    filepath = tmp_path / "file.csv"
+    filepath.write_text("x y \n1 2 \n")
+    DataFile(filepath, sidecar=True).get("x")
+
+    header_path = Sidecar(filepath, OPTIONS).path / "header.json"
+    header_path.write_text("{not json")
+    assert Sidecar(filepath, OPTIONS).load_column(0) is None
+    assert DataFile(filepath, sidecar=True).get("y").tolist() == [2]
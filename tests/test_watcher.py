@@ -0,0 +1,70 @@
+import threading
+import time
+
+from csv_manager import DataFile
+from csv_manager.database import Database
+from csv_manager.watcher import FolderWatcher
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_polling_watcher_reports_new_changed_and_removed_files(tmp_path):
+    reported = []
+    filepath = tmp_path / "run|T=1.csv"
+    with FolderWatcher(tmp_path, reported.extend, debounce=0.05, poll_interval=0.05, backend="polling"):
+        filepath.write_text("x \n1 \n")
+        wait_for(lambda: len(reported) == 1)
+        filepath.write_text("x \n1 \n2 \n")
+        wait_for(lambda: len(reported) == 2)
+        filepath.unlink()
+        wait_for(lambda: len(reported) == 3)
+
+    assert [path for path, signature in reported] == [str(filepath)] * 3
+    assert reported[0][1] is not None and reported[1][1] != reported[0][1] and reported[2][1] is None
+
+def test_watched_database_follows_the_folder(tmp_path):
+    (tmp_path / "run|T=1.csv").write_text("x \n1 \n")
+    database = Database()
+    database.load_from_folder(tmp_path, progress_callback=None)
+    events = []
+    database.subscribe(lambda event, datafile: events.append((event, datafile.sim_settings)))
+
+    database.watch(debounce=0.05, poll_interval=0.05, backend="polling")
+    try:
+        (tmp_path / "run|T=2.csv").write_text("x \n1 \n")
+        wait_for(lambda: len(events) == 1)
+        (tmp_path / "run|T=1.csv").unlink()
+        wait_for(lambda: len(events) == 2)
+    finally:
+        database.stop_watching()
+
+    assert events == [("added", {"T": "2"}), ("removed", {"T": "1"})]
+    assert [datafile.sim_settings for datafile in database.datafiles] == [{"T": "2"}]
+    assert [datafile.sim_settings for datafile in database.filter_datafiles(database.datafiles, filter_dict={"T": "2"})] == [{"T": "2"}]
+
+def test_added_files_are_kept_by_watcher_changes(tmp_path):
+    folder = tmp_path / "watched"
+    folder.mkdir()
+    (tmp_path / "other|T=3.csv").write_text("x \n1 \n")
+    database = Database()
+    database.load_from_folder(folder, progress_callback=None)
+
+    # `add()` waits for the changes of the watcher being applied, and the other way around
+    database._watch_lock.acquire()
+    adding = threading.Thread(target=database.add, args=(DataFile(tmp_path / "other|T=3.csv"),))
+    adding.start()
+    adding.join(0.1)
+    assert adding.is_alive()
+    database._watch_lock.release()
+    adding.join()
+
+    database.watch(debounce=0.05, poll_interval=0.05, backend="polling")
+    try:
+        (folder / "run|T=1.csv").write_text("x \n1 \n")
+        wait_for(lambda: len(database.datafiles) == 2)
+    finally:
+        database.stop_watching()
+    assert sorted(datafile.sim_settings["T"] for datafile in database.datafiles) == ["1", "3"]
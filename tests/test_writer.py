@@ -0,0 +1,21 @@
+import numpy as np
+
+from csv_manager.columns import format_column
+from csv_manager.writer import write
+
+def test_lists_and_arrays_are_written_the_same(tmp_path):
+    values = [1.0, float("nan"), 2.5]
+    for list_type, data in (("columns", [values, [1, 2, 3]]), ("rows", list(zip(values, values)))):
+        write(data, tmp_path / "list.csv", list_type=list_type)
+        array_data = [np.array(column) for column in data] if list_type == "columns" else np.array(data)
+        write(array_data, tmp_path / "array.csv", list_type=list_type)
+        assert (tmp_path / "list.csv").read_text() == (tmp_path / "array.csv").read_text()
+
+    write([np.array(values)], tmp_path / "array.csv", list_type="columns")
+    assert (tmp_path / "array.csv").read_text() == "1.0 \nnan \n2.5 \n"
+    write([np.array(values)], tmp_path / "array.csv", list_type="columns", float_format="%.2f")
+    assert (tmp_path / "array.csv").read_text() == "1.00 \nnan \n2.50 \n"
+
+def test_formatted_columns_are_written_as_csv_cells(tmp_path):
+    write([format_column(np.array([1.0, float("nan"), 2.5]))], tmp_path / "file.csv", list_type="columns")
+    assert (tmp_path / "file.csv").read_text() == "1 \n \n2.5 \n"